@@ -0,0 +1,54 @@
+"""Shared helpers for the crispy-sum benchmarks.
+
+The function folder is named ``crispy-sum`` so it cannot be imported with a
+plain import statement; the benchmarks load it through importlib instead.
+Run them from the function app root, e.g. ``python benchmarks/bench_padding.py``.
+"""
+import importlib
+import json
+import os
+import random
+import sys
+from typing import List
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTION_PACKAGE = "crispy-sum"
+ARTICLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "articles.jsonl")
+
+SENTENCES = [
+    "The company announced a new line of laptops aimed at students and creators.",
+    "Analysts expect the chip shortage to ease by the end of the next quarter.",
+    "The update brings a redesigned settings menu and better battery management.",
+    "Regulators in the EU have opened an investigation into the acquisition.",
+    "The startup raised forty million dollars in a series B round led by investors.",
+    "Early benchmarks show a noticeable jump in single-core performance.",
+    "The feature will roll out to all users over the coming weeks.",
+    "Critics argue the subscription price is too high for casual users.",
+]
+
+
+def load_function_module(name: str = ""):
+    """Imports the function package, or one of its submodules."""
+    if APP_ROOT not in sys.path:
+        sys.path.insert(0, APP_ROOT)
+    module = FUNCTION_PACKAGE + ("." + name if name else "")
+    return importlib.import_module(module)
+
+
+def mixed_length_corpus(size: int = 24, seed: int = 0) -> List[str]:
+    """Builds a reproducible corpus of articles from blurbs to long reads."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        num_sentences = rng.choice([4, 8, 16, 40, 80])
+        corpus.append(" ".join(rng.choice(SENTENCES) for _ in range(num_sentences)))
+    return corpus
+
+
+def load_articles(path: str = ARTICLES_PATH) -> List[dict]:
+    """
+    Loads the fixed article set used by the quality benchmarks. Every
+    article carries a hand-written reference ``summary``.
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
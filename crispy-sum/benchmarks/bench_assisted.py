@@ -0,0 +1,55 @@
+"""Assisted decoding against plain greedy decoding with the full model.
+
+Both runs use the "fast" preset (greedy) on the fixed article set, one
+article per batch, so the summaries should be identical. Reports accepted
+draft tokens, tokens per full-model pass and the end-to-end speedup.
+"""
+import argparse
+import time
+
+from _common import load_articles, load_function_module
+
+
+def run(summarizer, articles):
+    summarizer.warm_up()
+    start = time.perf_counter()
+    summaries = [
+        summarizer.summarize_bucketed([article], preset="fast")[0]
+        for article in articles
+    ]
+    return summaries, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--draft-model")
+    parser.add_argument("--draft-tokens", type=int)
+    args = parser.parse_args()
+
+    summarizer_module = load_function_module("summarizer")
+    articles = [article["content"] for article in load_articles()]
+
+    greedy, greedy_time = run(summarizer_module.CrispySummarizer(), articles)
+
+    assisted = summarizer_module.CrispySummarizer(backend="assisted")
+    if args.draft_model:
+        assisted.draft_model_name = args.draft_model
+    if args.draft_tokens:
+        assisted.engine.draft_tokens = args.draft_tokens
+    summaries, assisted_time = run(assisted, articles)
+
+    stats = assisted.engine.stats()
+    matching = sum(a == b for a, b in zip(summaries, greedy))
+    print(f"draft {assisted.draft_model_name}")
+    print(f"greedy   {greedy_time / len(articles) * 1000:7.0f}ms/article")
+    print(
+        f"assisted {assisted_time / len(articles) * 1000:7.0f}ms/article "
+        f"({greedy_time / assisted_time:.2f}x) "
+        f"{stats['tokens_per_step']:.2f} tokens/step "
+        f"acceptance={stats['acceptance_rate']:.2f} "
+        f"{matching}/{len(articles)} summaries identical"
+    )
+
+
+if __name__ == "__main__":
+    main()
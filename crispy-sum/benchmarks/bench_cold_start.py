@@ -0,0 +1,65 @@
+"""Import-to-first-summary time of fresh function workers.
+
+Each configuration runs in a new Python process that imports the function
+package and serves a one-article request through its HTTP trigger, the way
+the first invocation after an Azure Functions cold start does. Models load
+from the local registry only (CRISPY_OFFLINE=1); build it first with
+tools/prepare_models.py, including the variants you want to compare.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+CHILD = """
+import json, sys
+import azure.functions as func
+sys.path.insert(0, {benchmarks!r})
+from _common import load_articles, load_function_module
+
+module = load_function_module()
+article_list = module.ArticleBatch()
+article_list.articles.add(article_id="0", content=load_articles()[0]["content"])
+body = article_list.SerializeToString()
+module.main(func.HttpRequest("POST", "/api/crispy-sum", body=body))
+print(json.dumps({{"seconds": module.first_summary_seconds}}))
+"""
+
+CONFIGS = {
+    "fp32": {"CRISPY_PRECISION": "fp32"},
+    "int8": {"CRISPY_PRECISION": "int8"},
+    "onnx": {"CRISPY_BACKEND": "onnx"},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=CONFIGS)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    code = CHILD.format(benchmarks=os.path.dirname(os.path.abspath(__file__)))
+    for name in args.configs:
+        env = dict(os.environ, CRISPY_OFFLINE="1", **CONFIGS[name])
+        imports, processes = [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, "-c", code],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            processes.append(time.perf_counter() - start)
+            imports.append(json.loads(output.splitlines()[-1])["seconds"])
+        print(
+            f"{name:<6} import to first summary {min(imports):6.2f}s "
+            f"(process {min(processes):6.2f}s), best of {args.runs}"
+        )
+
+
+if __name__ == "__main__":
+    main()
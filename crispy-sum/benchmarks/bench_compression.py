@@ -0,0 +1,155 @@
+"""Bytes on the wire with zstd, with and without the news dictionary.
+
+Builds the bodies the pipeline actually sends from a sample of articles:
+the scraper's RabbitMQ messages (JSON), the listener's ArticleBatch
+requests of 10 articles, the same articles as a framed stream, and the
+SummaryBatch responses. Each is compressed the way the transport does it
+and reported as raw and compressed bytes plus compression and
+decompression time.
+
+Point --dump at a JSON-lines export of a real crawl (content, title, url,
+date); the bundled benchmark set is the default but is far too small to
+train a dictionary. Without --dictionary, one is trained on every other
+article of the sample and measured on the rest, so the numbers are for
+articles the dictionary has not seen.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import zstandard
+
+from _common import ARTICLES_PATH, load_articles, load_function_module
+
+BATCH_SIZE = 10
+
+
+def summary_text(article: dict) -> str:
+    """The reference summary, or the first three sentences as a stand-in."""
+    return article.get("summary") or ". ".join(article["content"].split(". ")[:3])
+
+
+def bodies(article_pb2, summary_pb2, framing, articles):
+    """(name, list of bodies) for every kind of message on the wire."""
+    messages = [
+        article_pb2.Article(
+            article_id=str(article.get("article_id", i)),
+            title=article.get("title", ""),
+            url=article.get("url", ""),
+            content=article.get("content", ""),
+            date=article.get("date", ""),
+        )
+        for i, article in enumerate(articles)
+    ]
+    batches = [
+        messages[i : i + BATCH_SIZE] for i in range(0, len(messages), BATCH_SIZE)
+    ]
+    rmq = [
+        json.dumps({"payload": article, "mandatory": False}).encode("utf-8")
+        for article in articles
+    ]
+    requests = [
+        article_pb2.ArticleBatch(articles=batch).SerializeToString()
+        for batch in batches
+    ]
+    streams = [
+        framing.frame(article_pb2.ArticleBatch())
+        + b"".join(framing.frame(message) for message in batch)
+        for batch in batches
+    ]
+    responses = [
+        summary_pb2.SummaryBatch(
+            summaries=[
+                summary_pb2.Summary(
+                    article_id=message.article_id,
+                    title=message.title,
+                    url=message.url,
+                    date=message.date,
+                    summary=summary_text(article),
+                )
+                for message, article in zip(batch, articles[i * BATCH_SIZE :])
+            ]
+        ).SerializeToString()
+        for i, batch in enumerate(batches)
+    ]
+    return [
+        ("rmq article", rmq),
+        ("http request", requests),
+        ("framed stream", streams),
+        ("http response", responses),
+    ]
+
+
+def measure(codec, payloads):
+    raw = sum(len(payload) for payload in payloads)
+    start = time.perf_counter()
+    compressed = [codec.compress(payload) for payload in payloads]
+    compress_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for data in compressed:
+        codec.decompress(data)
+    decompress_seconds = time.perf_counter() - start
+    compressed_bytes = sum(len(data) for data in compressed)
+    return raw, compressed_bytes, compress_seconds, decompress_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dump", default=ARTICLES_PATH)
+    parser.add_argument("--dictionary", default=None)
+    parser.add_argument("--dictionary-size", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    article_pb2 = load_function_module("article_pb2")
+    summary_pb2 = load_function_module("summary_pb2")
+    framing = load_function_module("framing")
+    compression = load_function_module("compression")
+
+    articles = [
+        article for article in load_articles(args.dump) if article.get("content")
+    ]
+    codecs = [("zstd", compression.ZstdCodec(), articles)]
+    if args.dictionary:
+        codecs.append(("zstd+dict", compression.ZstdCodec(args.dictionary), articles))
+    else:
+        training, held_out = articles[::2], articles[1::2]
+        samples = [
+            article_pb2.Article(
+                title=article.get("title", ""),
+                url=article.get("url", ""),
+                content=article["content"],
+                date=article.get("date", ""),
+            ).SerializeToString()
+            for article in training
+        ]
+        try:
+            dictionary = zstandard.train_dictionary(args.dictionary_size, samples)
+        except zstandard.ZstdError as e:
+            print(f"no dictionary from {len(samples)} articles: {e}")
+        else:
+            with tempfile.NamedTemporaryFile(suffix=".dict") as f:
+                f.write(dictionary.as_bytes())
+                f.flush()
+                codecs = [
+                    ("zstd", compression.ZstdCodec(), held_out),
+                    ("zstd+dict", compression.ZstdCodec(f.name), held_out),
+                ]
+
+    print(f"{len(articles)} articles from {args.dump}")
+    for label, codec, sample in codecs:
+        for name, payloads in bodies(article_pb2, summary_pb2, framing, sample):
+            ## RabbitMQ messages are compressed without the dictionary
+            if name == "rmq article" and codec.dictionary is not None:
+                continue
+            raw, compressed, compress_s, decompress_s = measure(codec, payloads)
+            print(
+                f"{label:<10} {name:<14} {raw:>10d}B -> {compressed:>9d}B "
+                f"({1 - compressed / raw:6.1%} saved) "
+                f"{compress_s / len(payloads) * 1e6:7.0f}us compress "
+                f"{decompress_s / len(payloads) * 1e6:6.0f}us decompress"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Recall, false matches and latency of the near-duplicate index.
+
+Every article of the fixed set is indexed, then looked up again after
+rewriting a growing share of its words, the way syndicated copies differ
+from the original. Reports how many rewrites still match (recall), how
+many lookups match a different article, and the time per signature lookup.
+No model is loaded.
+"""
+import argparse
+import random
+import time
+
+from _common import load_articles, load_function_module
+
+
+def rewrite(text: str, share: float, rng: random.Random) -> str:
+    """Replaces ``share`` of the words with words from elsewhere in the text."""
+    words = text.split()
+    for i in rng.sample(range(len(words)), int(len(words) * share)):
+        words[i] = rng.choice(words)
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--shares", type=float, nargs="+", default=[0.0, 0.01, 0.02, 0.05, 0.1]
+    )
+    parser.add_argument("--threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    dedup = load_function_module("dedup")
+    articles = [article["content"] for article in load_articles()]
+    index = dedup.NearDuplicateIndex(threshold=args.threshold)
+    for i, article in enumerate(articles):
+        index.add(article, str(i))
+
+    rng = random.Random(0)
+    print(f"threshold={index.threshold} articles={len(articles)}")
+    for share in args.shares:
+        matched = wrong = 0
+        start = time.perf_counter()
+        for i, article in enumerate(articles):
+            found = index.find(rewrite(article, share, rng))
+            matched += found == str(i)
+            wrong += found is not None and found != str(i)
+        elapsed = time.perf_counter() - start
+        print(
+            f"rewritten={share:<5.0%} recall={matched / len(articles):6.1%} "
+            f"wrong={wrong:<3d} {elapsed / len(articles) * 1000:6.2f}ms/lookup"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Latency and ROUGE of the extractive pre-filter at several target lengths.
+
+Each target shortens every article longer than it to its top ranked
+sentences before the abstractive model runs; 0 is the unfiltered baseline.
+ROUGE is scored against the reference summaries of the fixed article set.
+Those articles are a couple of hundred tokens long, so the default targets
+sit below that; pass larger --targets for a corpus of long-form pieces.
+"""
+import argparse
+import time
+
+from _common import load_articles, load_function_module
+from rouge import mean_scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--targets", type=int, nargs="+", default=[0, 160, 128, 96, 64]
+    )
+    parser.add_argument("--method", choices=["textrank", "tfidf"], default="textrank")
+    args = parser.parse_args()
+
+    summarizer_module = load_function_module("summarizer")
+    dataset = load_articles()
+    articles = [article["content"] for article in dataset]
+    references = [article["summary"] for article in dataset]
+
+    for target in args.targets:
+        summarizer = summarizer_module.CrispySummarizer(extractive_tokens=target)
+        if summarizer.extractive is not None:
+            summarizer.extractive.method = args.method
+        summarizer.warm_up()
+
+        start = time.perf_counter()
+        input_tokens = sum(len(ids) for ids in summarizer.encode(articles))
+        summaries = summarizer.summarize_bucketed(articles)
+        elapsed = time.perf_counter() - start
+        scores = mean_scores(summaries, references)
+        print(
+            f"target={target or 'off':<5} {input_tokens:6d} input tokens "
+            f"{elapsed / len(articles) * 1000:7.0f}ms/article "
+            + " ".join(f"{key}={value:.3f}" for key, value in scores.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Truncation versus windowed map-reduce on articles longer than max_length.
+
+Long-form pieces are made by joining the fixed article set in rotated
+orders, each well over max_length, with the joined references as their
+reference. With --windows 0 the model sees the first max_length tokens
+only; otherwise every article is split into that many overlapping windows
+whose summaries are summarized again. Reports the share of the article the
+model saw, latency, peak memory over the baseline and ROUGE.
+"""
+import argparse
+import time
+
+from _common import load_articles, load_function_module
+from rouge import mean_scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--windows", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--overlap", type=int, default=None)
+    args = parser.parse_args()
+
+    summarizer_module = load_function_module("summarizer")
+    batcher_module = load_function_module("batcher")
+    dataset = load_articles()
+    articles, references = [], []
+    for shift in range(len(dataset)):
+        rotated = dataset[shift:] + dataset[:shift]
+        articles.append(" ".join(article["content"] for article in rotated))
+        references.append(" ".join(article["summary"] for article in rotated))
+
+    for windows in args.windows:
+        summarizer = summarizer_module.CrispySummarizer(max_windows=windows)
+        if args.overlap is not None:
+            summarizer.window_overlap = args.overlap
+        summarizer.warm_up()
+        batcher = batcher_module.TokenBudgetBatcher()
+
+        rows = len(articles)
+        if windows:
+            rows = sum(len(summarizer._windows(article)) for article in articles)
+        full = [
+            len(summarizer.tokenizer(article, add_special_tokens=False)["input_ids"])
+            for article in articles
+        ]
+        stride = summarizer.max_length - 2 - summarizer.window_overlap
+        seen = [
+            min(length, stride * (max(windows, 1) - 1) + summarizer.max_length - 2)
+            for length in full
+        ]
+
+        with batcher_module.PeakRSSSampler() as sampler:
+            start = time.perf_counter()
+            summaries = summarizer.summarize_bucketed(articles, batcher=batcher)
+            elapsed = time.perf_counter() - start
+        scores = mean_scores(summaries, references)
+        print(
+            f"windows={windows or 'off':<4} {sum(seen) / sum(full):6.1%} seen "
+            f"{rows:3d} rows "
+            f"{elapsed / len(articles) * 1000:7.0f}ms/article "
+            f"{(sampler.peak - sampler.baseline) / 2**20:6.0f}MB peak "
+            + " ".join(f"{key}={value:.3f}" for key, value in scores.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Tokens/sec of max_length padding vs. dynamic padding with length buckets."""
+import argparse
+import time
+
+from _common import load_function_module, mixed_length_corpus
+
+
+def run(label, summarize, articles, num_tokens):
+    start = time.perf_counter()
+    summarize(articles)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.2f}s {num_tokens / elapsed:10.1f} tokens/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=24)
+    parser.add_argument("--batch-size", type=int, default=3)
+    args = parser.parse_args()
+
+    summarizer = load_function_module("summarizer").CrispySummarizer()
+    articles = mixed_length_corpus(args.articles)
+    num_tokens = sum(len(ids) for ids in summarizer.encode(articles))
+    print(f"{len(articles)} articles, {num_tokens} input tokens")
+
+    def fixed(articles):
+        for start in range(0, len(articles), args.batch_size):
+            summarizer(articles[start : start + args.batch_size], padding="max_length")
+
+    def bucketed(articles):
+        ## The lengths __call__ uses, so both sides produce the same summaries
+        summarizer.summarize_bucketed(
+            articles,
+            bucket_size=args.batch_size,
+            max_new_tokens=119,
+            min_length=40,
+            num_beams=4,
+        )
+
+    run("max_length padding", fixed, articles, num_tokens)
+    run("dynamic + buckets", bucketed, articles, num_tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Throughput of SummarizerPool for each replica count K on this host.
+
+Every K splits the available cores into K disjoint sets. The report ends
+with the K that gave the most articles/sec.
+"""
+import argparse
+import os
+import time
+
+from _common import load_function_module, mixed_length_corpus
+
+
+def main():
+    cores = len(os.sched_getaffinity(0))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=48)
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        nargs="+",
+        default=[k for k in (1, 2, 3, 4, 6, 8, 12, 16) if k <= cores],
+    )
+    args = parser.parse_args()
+
+    pool_module = load_function_module("pool")
+    batcher = load_function_module("batcher").TokenBudgetBatcher()
+    articles = mixed_length_corpus(args.articles)
+
+    results = {}
+    print(f"{cores} cores, {len(articles)} articles")
+    for replicas in args.replicas:
+        pool = pool_module.SummarizerPool(replicas)
+        pool.warm_up()
+        start = time.perf_counter()
+        pool.summarize_bucketed(articles, batcher=batcher)
+        elapsed = time.perf_counter() - start
+        pool.close()
+
+        results[replicas] = len(articles) / elapsed
+        threads = cores // replicas
+        print(f"K={replicas:<3} ~{threads} threads each {results[replicas]:8.2f} articles/sec")
+
+    best = max(results, key=results.get)
+    print(f"optimal K={best} ({results[best]:.2f} articles/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Latency and ROUGE of each generation preset on the fixed article set.
+
+Every article is sent as its own request, the way the listener's batches
+reach the scheduler, and latency is measured per request. ROUGE is scored
+against the hand-written reference summaries and, as "agreement", against
+the summaries of the quality preset. With --latency-budget-ms the policy
+first learns this host's decoding cost from one unbudgeted pass, then runs
+every preset again under the budget.
+"""
+import argparse
+import statistics
+import time
+
+from _common import load_articles, load_function_module
+from rouge import mean_scores
+
+
+def run(summarizer, articles, preset, latency_budget_ms=None):
+    summaries, latencies = [], []
+    for article in articles:
+        start = time.perf_counter()
+        summaries += summarizer.summarize_bucketed(
+            [article], preset=preset, latency_budget_ms=latency_budget_ms
+        )
+        latencies.append(time.perf_counter() - start)
+    return summaries, latencies
+
+
+def report(name, summaries, latencies, references, quality):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, round(0.95 * (len(latencies) - 1)))]
+    scores = mean_scores(summaries, references)
+    agreement = mean_scores(summaries, quality)["rougeL"]
+    print(
+        f"{name:<20} p50={statistics.median(latencies) * 1000:7.0f}ms "
+        f"p95={p95 * 1000:7.0f}ms "
+        + " ".join(f"{key}={value:.3f}" for key, value in scores.items())
+        + f" agreement={agreement:.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-budget-ms", type=float)
+    args = parser.parse_args()
+
+    generation = load_function_module("generation")
+    summarizer = load_function_module("summarizer").CrispySummarizer()
+    dataset = load_articles()
+    articles = [article["content"] for article in dataset]
+    references = [article["summary"] for article in dataset]
+
+    summarizer.warm_up()
+    results = {preset: run(summarizer, articles, preset) for preset in generation.PRESETS}
+    quality = results["quality"][0]
+    for preset, (summaries, latencies) in results.items():
+        report(preset, summaries, latencies, references, quality)
+
+    if args.latency_budget_ms:
+        for preset in generation.PRESETS:
+            summaries, latencies = run(
+                summarizer, articles, preset, args.latency_budget_ms
+            )
+            name = f"{preset}@{args.latency_budget_ms:g}ms"
+            report(name, summaries, latencies, references, quality)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Parse-to-serialize overhead of the function's request path, per 1,000 articles.
+
+The model is left out: the micro-batch scheduler is swapped for one that
+answers every article at once, so what is timed is parsing the ArticleBatch,
+handing each article to the scheduler, building the SummaryBatch and
+serializing it. Times summarize_batch alone and the whole HTTP trigger
+(main, which adds profiling and the response), with and without
+pre-tokenized ids.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import Future
+
+import azure.functions as func
+from _common import load_function_module, mixed_length_corpus
+
+
+class InstantScheduler:
+    """Resolves every article immediately with a fixed summary."""
+
+    def __init__(self, profile_class):
+        self.profile = profile_class()
+
+    def submit(self, article, *options, **keywords):
+        future = Future()
+        future.set_result((article[:200], "bench", self.profile))
+        return future
+
+
+def build_body(function, articles, version) -> bytes:
+    article_list = function.ArticleBatch()
+    for i, article in enumerate(articles):
+        message = article_list.articles.add(
+            content=article,
+            article_id=str(i),
+            title=f"Article {i}",
+            url=f"https://example.com/{i}",
+            date="2023-03-01T00:00:00",
+        )
+        if version is not None:
+            ## Stand-in ids of a realistic length; only their size matters here
+            message.input_ids.extend(range(min(len(article.split()) * 4 // 3, 1024)))
+            message.tokenizer_version = version
+    return article_list.SerializeToString()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    function = load_function_module()
+    metrics = load_function_module("metrics")
+    function.scheduler = InstantScheduler(metrics.Profile)
+    version = function.summarizer.tokenizer_version
+
+    def direct_path(body):
+        article_list = function.ArticleBatch()
+        article_list.ParseFromString(body)
+        function.summarize_batch(article_list)
+
+    def trigger_path(body):
+        function.main(func.HttpRequest("POST", "/api/crispy-sum", body=body))
+
+    articles = mixed_length_corpus(args.articles)
+    for label, tag in (("text only", None), ("pre-tokenized", version)):
+        body = build_body(function, articles, tag)
+        for name, path in (("direct", direct_path), ("trigger", trigger_path)):
+            path(body)
+            timings = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                path(body)
+                timings.append(time.perf_counter() - start)
+            per_thousand = statistics.median(timings) * 1000 / args.articles * 1000
+            print(
+                f"{label:<14} {name:<7} {len(body) / 1024 / 1024:6.1f}MB request "
+                f"{per_thousand:8.2f}ms per 1,000 articles"
+            )
+
+
+if __name__ == "__main__":
+    main()
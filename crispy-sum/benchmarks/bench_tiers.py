@@ -0,0 +1,58 @@
+"""Per-tier throughput of the ModelRouter against the full model alone.
+
+The mixed-length corpus is summarized twice: once by the full model only,
+once through the router, which sends articles of at most --max-tokens
+tokens to the distilled tier. The router run reports articles/sec and
+tokens/sec for each tier.
+"""
+import argparse
+import time
+
+from _common import load_function_module, mixed_length_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=24)
+    parser.add_argument("--max-tokens", type=int)
+    parser.add_argument("--distilled", default="sshleifer/distilbart-cnn-12-6")
+    args = parser.parse_args()
+
+    loader = load_function_module("loader")
+    summarizer_module = load_function_module("summarizer")
+    full = summarizer_module.CrispySummarizer()
+    distilled = summarizer_module.CrispySummarizer(
+        model_name=loader.DISTILLED_MODEL_NAME or args.distilled
+    )
+    router = load_function_module("router").ModelRouter(
+        full, distilled, max_tokens=args.max_tokens
+    )
+    router.warm_up()
+
+    articles = mixed_length_corpus(args.articles)
+    lengths = [len(ids) for ids in full.encode(articles)]
+    routed = router.route(lengths)
+    print(
+        f"{len(articles)} articles, {sum(t is distilled for t in routed)} "
+        f"at or under {router.max_tokens} tokens go to {distilled.model_name}"
+    )
+
+    start = time.perf_counter()
+    full.summarize_bucketed(articles)
+    elapsed = time.perf_counter() - start
+    print(f"{'full only':<40} {len(articles) / elapsed:8.2f} articles/sec")
+
+    start = time.perf_counter()
+    router.summarize_bucketed(articles)
+    elapsed = time.perf_counter() - start
+    print(f"{'routed':<40} {len(articles) / elapsed:8.2f} articles/sec")
+    for model_name, stats in router.throughput().items():
+        print(
+            f"  {model_name:<38} {stats['articles']:4d} articles "
+            f"{stats['articles_per_sec']:8.2f} articles/sec "
+            f"{stats['tokens_per_sec']:10.1f} tokens/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
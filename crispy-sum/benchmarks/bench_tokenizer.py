@@ -0,0 +1,52 @@
+"""Tokenization time per ArticleBatch, slow (Python) vs fast (Rust) tokenizer.
+
+Each round parses a serialized ArticleBatch, encodes every article and
+decodes a summary-sized slice of each, which is the tokenizer work of one
+request.
+"""
+import argparse
+import time
+
+from _common import load_function_module, mixed_length_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    torch = __import__("torch")
+    summarizer_module = load_function_module("summarizer")
+    ArticleBatch = load_function_module("article_pb2").ArticleBatch
+
+    batch = ArticleBatch()
+    for i, content in enumerate(mixed_length_corpus(args.articles)):
+        batch.articles.add(article_id=str(i), content=content)
+    payload = batch.SerializeToString()
+
+    for fast in (False, True):
+        summarizer = summarizer_module.CrispySummarizer()
+        summarizer.fast_tokenizer = fast
+        summarizer.tokenizer  # load outside the timed rounds
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            articles = ArticleBatch()
+            articles.ParseFromString(payload)
+            input_ids = summarizer.encode([a.content for a in articles.articles])
+            summary_ids = torch.tensor(
+                [ids[:120] for ids in input_ids if len(ids) >= 120]
+            )
+            summarizer.decode(summary_ids)
+        elapsed = (time.perf_counter() - start) / args.rounds
+
+        label = "fast (Rust)" if fast else "slow (Python)"
+        print(
+            f"{label:<14} {elapsed * 1000:8.2f} ms per ArticleBatch "
+            f"of {args.articles}"
+        )
+
+
+if __name__ == "__main__":
+    main()
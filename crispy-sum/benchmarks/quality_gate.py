@@ -0,0 +1,53 @@
+"""Compares reduced-precision summaries against fp32 on the fixed article set.
+
+The fp32 summaries are the references. The gate fails (exit code 1) if the
+mean ROUGE-L of a precision drops below --min-rouge-l.
+"""
+import argparse
+import sys
+import time
+
+from _common import load_articles, load_function_module
+from rouge import mean_scores
+
+
+def summarize(summarizer, articles):
+    start = time.perf_counter()
+    summaries = summarizer.summarize_bucketed(articles)
+    return summaries, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--precisions", nargs="+", default=["int8", "bf16"])
+    parser.add_argument("--min-rouge-l", type=float, default=0.8)
+    args = parser.parse_args()
+
+    module = load_function_module("summarizer")
+    articles = [article["content"] for article in load_articles()]
+
+    reference, reference_time = summarize(module.CrispySummarizer("fp32"), articles)
+    print(f"{'fp32':<6} {len(articles) / reference_time:6.2f} articles/sec")
+
+    passed = True
+    for precision in args.precisions:
+        summarizer = module.CrispySummarizer(precision)
+        if summarizer.precision != precision:
+            print(f"{precision:<6} unsupported on this host, skipped")
+            continue
+        summaries, elapsed = summarize(summarizer, articles)
+        scores = mean_scores(summaries, reference)
+        ok = scores["rougeL"] >= args.min_rouge_l
+        passed = passed and ok
+        print(
+            f"{precision:<6} {len(articles) / elapsed:6.2f} articles/sec "
+            f"({reference_time / elapsed:.2f}x) "
+            + " ".join(f"{key}={value:.3f}" for key, value in scores.items())
+            + ("" if ok else "  FAIL")
+        )
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
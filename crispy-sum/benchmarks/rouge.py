@@ -0,0 +1,59 @@
+"""Minimal ROUGE-1/2/L F1, enough to compare summaries between model variants.
+
+Tokens are lowercased alphanumeric words; no stemming or stopword removal.
+"""
+import re
+from collections import Counter
+from typing import Dict, List
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def _f1(overlap: int, candidate_total: int, reference_total: int) -> float:
+    if not overlap:
+        return 0.0
+    precision = overlap / candidate_total
+    recall = overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def _ngrams(tokens: List[str], n: int) -> Counter:
+    return Counter(tuple(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+
+
+def rouge_n(candidate: List[str], reference: List[str], n: int) -> float:
+    cand, ref = _ngrams(candidate, n), _ngrams(reference, n)
+    overlap = sum((cand & ref).values())
+    return _f1(overlap, sum(cand.values()), sum(ref.values()))
+
+
+def rouge_l(candidate: List[str], reference: List[str]) -> float:
+    ## Longest common subsequence, one row at a time
+    previous = [0] * (len(reference) + 1)
+    for token in candidate:
+        current = [0]
+        for j, ref_token in enumerate(reference):
+            if token == ref_token:
+                current.append(previous[j] + 1)
+            else:
+                current.append(max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(candidate), len(reference))
+
+
+def score(candidate: str, reference: str) -> Dict[str, float]:
+    cand, ref = tokenize(candidate), tokenize(reference)
+    return {
+        "rouge1": rouge_n(cand, ref, 1),
+        "rouge2": rouge_n(cand, ref, 2),
+        "rougeL": rouge_l(cand, ref),
+    }
+
+
+def mean_scores(candidates: List[str], references: List[str]) -> Dict[str, float]:
+    scores = [score(c, r) for c, r in zip(candidates, references)]
+    return {key: sum(s[key] for s in scores) / len(scores) for key in scores[0]}
@@ -0,0 +1,199 @@
+"""Reproducible throughput suite for CrispySummarizer and summarize_batch.
+
+Sweeps batch size, input length (tokens), torch thread count and generation
+preset over inputs built from the bundled corpus, so every run sees the
+same token ids. For each combination it reports articles/sec, input
+tokens/sec, p50/p95 batch latency and peak RSS, and writes them as JSON.
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json
+
+With --baseline, every combination is compared with the stored run and the
+exit code is 1 if articles/sec dropped, or p95 latency rose, by more than
+--tolerance.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import torch
+
+from _common import load_articles, load_function_module
+
+METRICS = ("articles_per_sec", "tokens_per_sec", "p50_ms", "p95_ms", "peak_rss_mb")
+## Higher is better for throughput, lower for latency
+REGRESSIONS = {"articles_per_sec": -1, "p95_ms": 1}
+
+
+def corpus_ids(tokenizer) -> list:
+    """Token ids of the whole bundled corpus, without special tokens."""
+    text = " ".join(article["content"] for article in load_articles())
+    return tokenizer(text, add_special_tokens=False)["input_ids"]
+
+
+def make_inputs(tokenizer, ids, batch_size, input_length):
+    """batch_size articles of exactly input_length tokens, distinct windows."""
+    body = input_length - 2
+    rows = []
+    for i in range(batch_size):
+        start = (i * 97) % len(ids)
+        window = list(itertools.islice(itertools.cycle(ids), start, start + body))
+        rows.append([tokenizer.bos_token_id, *window, tokenizer.eos_token_id])
+    texts = tokenizer.batch_decode(rows, skip_special_tokens=True)
+    return texts, rows
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def run_config(summarize, texts, rows, preset, repeats, sampler_class):
+    latencies = []
+    with sampler_class() as sampler:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            summarize(texts, rows, preset)
+            latencies.append(time.perf_counter() - start)
+
+    mean = statistics.mean(latencies)
+    return {
+        "articles_per_sec": len(rows) / mean,
+        "tokens_per_sec": sum(len(row) for row in rows) / mean,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "peak_rss_mb": sampler.peak / 1024 / 1024,
+    }
+
+
+def compare(results, baseline, tolerance) -> bool:
+    """Prints the change of every metric against the baseline run."""
+    stored = {
+        json.dumps(entry["config"], sort_keys=True): entry for entry in baseline
+    }
+    passed = True
+    for entry in results:
+        previous = stored.get(json.dumps(entry["config"], sort_keys=True))
+        if previous is None:
+            print(f"{entry['config']}: not in baseline")
+            continue
+        changes = []
+        for metric in METRICS:
+            old, new = previous["metrics"][metric], entry["metrics"][metric]
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if metric in REGRESSIONS and change * REGRESSIONS[metric] > tolerance:
+                flag, passed = " REGRESSION", False
+            changes.append(f"{metric}={change:+.1%}{flag}")
+        print(f"{entry['config']}: " + " ".join(changes))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--target", choices=["summarizer", "function"], default="summarizer"
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument(
+        "--input-lengths", type=int, nargs="+", default=[128, 512, 1024]
+    )
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[torch.get_num_threads()]
+    )
+    parser.add_argument("--presets", nargs="+", default=["fast", "balanced", "quality"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    ## Repeats must run the model, not hit the summary cache or reuse the
+    ## summary of an overlapping input; read at import
+    os.environ["CRISPY_CACHE_ENTRIES"] = "0"
+    os.environ["CRISPY_NEAR_DUP_THRESHOLD"] = "0"
+    os.environ.pop("CRISPY_CACHE_PATH", None)
+    summarizer = load_function_module("summarizer").CrispySummarizer()
+    tokenizer = summarizer.tokenizer
+    sampler_class = load_function_module("batcher").PeakRSSSampler
+    if args.target == "function":
+        ## The deployed path: scheduler, router and protobuf serialization
+        function = load_function_module()
+        version = function.summarizer.tokenizer_version
+
+        def summarize(texts, rows, preset):
+            article_list = function.ArticleBatch(generation_preset=preset)
+            for i, (text, row) in enumerate(zip(texts, rows)):
+                article_list.articles.add(
+                    content=text,
+                    article_id=str(i),
+                    input_ids=row,
+                    tokenizer_version=version,
+                )
+            function.summarize_batch(article_list)
+
+    else:
+
+        def summarize(texts, rows, preset):
+            summarizer.summarize_bucketed(
+                texts, bucket_size=len(rows), input_ids=rows, preset=preset
+            )
+
+    ids = corpus_ids(tokenizer)
+    results = []
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        ## One untimed batch per thread count: weights, caches, allocator
+        summarize(*make_inputs(tokenizer, ids, 1, 64), "fast")
+        for batch_size, input_length, preset in itertools.product(
+            args.batch_sizes, args.input_lengths, args.presets
+        ):
+            texts, rows = make_inputs(tokenizer, ids, batch_size, input_length)
+            config = {
+                "target": args.target,
+                "threads": threads,
+                "batch_size": batch_size,
+                "input_length": input_length,
+                "preset": preset,
+            }
+            metrics = run_config(
+                summarize, texts, rows, preset, args.repeats, sampler_class
+            )
+            results.append({"config": config, "metrics": metrics})
+            print(
+                f"threads={threads:<3} batch={batch_size:<3} tokens={input_length:<5} "
+                f"{preset:<9} "
+                + " ".join(f"{key}={value:.1f}" for key, value in metrics.items()),
+                file=sys.stderr,
+            )
+
+    report = {
+        "host": {
+            "cpus": len(os.sched_getaffinity(0)),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        sys.exit(0 if compare(results, baseline, args.tolerance) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Checks that the fast tokenizer matches the slow one on our articles.
+
+Compares input ids for the fixed and synthetic article sets, and the text
+CrispySummarizer.decode produces from them with each tokenizer. Exits 1 on
+the first mismatch.
+"""
+import sys
+
+from _common import load_articles, load_function_module, mixed_length_corpus
+
+
+def main():
+    summarizer_module = load_function_module("summarizer")
+    torch = __import__("torch")
+
+    slow = summarizer_module.CrispySummarizer()
+    slow.fast_tokenizer = False
+    fast = summarizer_module.CrispySummarizer()
+    fast.fast_tokenizer = True
+
+    articles = [article["content"] for article in load_articles()]
+    articles += mixed_length_corpus()
+    slow_ids, fast_ids = slow.encode(articles), fast.encode(articles)
+
+    for i, (expected, actual) in enumerate(zip(slow_ids, fast_ids)):
+        if expected != actual:
+            print(f"article {i}: input ids differ")
+            sys.exit(1)
+
+        ## Decode a summary-sized slice, as generate would
+        ids = torch.tensor([expected[:120]])
+        expected_text, actual_text = slow.decode(ids), fast.decode(ids)
+        if expected_text != actual_text:
+            print(f"article {i}: decoded text differs")
+            print(f"  slow: {expected_text[0]!r}")
+            print(f"  fast: {actual_text[0]!r}")
+            sys.exit(1)
+
+    print(f"{len(articles)} articles: fast and slow tokenizers match")
+
+
+if __name__ == "__main__":
+    main()
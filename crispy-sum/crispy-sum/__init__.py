@@ -1,75 +1,333 @@
+import contextvars
 import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
 import traceback
-from typing import List
+from typing import Iterable, Iterator, List, Optional
+
+## Cold start metric: import of this module to the first summary it serves
+IMPORT_STARTED = time.perf_counter()
+first_summary_seconds = None
 
 import azure.functions as func
-from torch.utils.data import DataLoader
 
+from .batcher import TokenBudgetBatcher
+from .cache import SummaryCache
+from .compression import ZSTD_ENCODING, DecompressionError, ZstdCodec, accepts
+from .dedup import NearDuplicateIndex
+from .framing import STREAM_CONTENT_TYPE, frame, read_frames
+from .loader import DISTILLED_MODEL_NAME
+from .metrics import REGISTRY, Profile, current_profile, profiling, stage
+from .pool import REPLICA_NAME, SummarizerPool
+from .router import ModelRouter
+from .scheduler import MicroBatchScheduler
 from .summarizer import CrispySummarizer
-from .article_pb2 import ArticleBatch
+from .article_pb2 import Article, ArticleBatch
 from .summary_pb2 import Summary, SummaryBatch
 
 
-summarizer = CrispySummarizer()
+POOL_REPLICAS = int(os.environ.get("CRISPY_POOL_REPLICAS", 0))
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+## Pool replicas import this package only to reach their entry point; the
+## caches, models and scheduler are built in the serving process alone
+SERVING = not multiprocessing.current_process().name.startswith(REPLICA_NAME)
+if SERVING:
+    cache = SummaryCache(os.environ.get("CRISPY_CACHE_PATH"))
+    ## Syndicated and rewritten copies of a story reuse its summary; a threshold
+    ## of 0 turns this off
+    near_duplicates = None
+    if NearDuplicateIndex.threshold:
+        near_duplicates = NearDuplicateIndex()
 
-def parse_request(req: func.HttpRequest) -> List[dict]:
-    serializedString = req.get_body()
-    article_list = ArticleBatch()
-    article_list.ParseFromString(serializedString)
+    ## With CRISPY_POOL_REPLICAS set, inference runs in that many pinned worker
+    ## processes
+    if POOL_REPLICAS:
+        summarizer = SummarizerPool(
+            POOL_REPLICAS, cache=cache, near_duplicates=near_duplicates
+        )
+    else:
+        summarizer = CrispySummarizer(cache=cache, near_duplicates=near_duplicates)
+    ## Short articles, and everything under backlog, go to the distilled tier,
+    ## which always runs in this process
+    if DISTILLED_MODEL_NAME:
+        summarizer = ModelRouter(
+            summarizer,
+            CrispySummarizer(
+                cache=cache,
+                model_name=DISTILLED_MODEL_NAME,
+                near_duplicates=near_duplicates,
+            ),
+        )
+    ## zstd request and response bodies, with the news dictionary the listener
+    ## also loads if one is configured
+    codec = ZstdCodec(os.environ.get("CRISPY_ZSTD_DICTIONARY"))
+    batcher = TokenBudgetBatcher()
+    ## Articles from concurrent invocations share micro-batches; with a pool,
+    ## one scheduler thread per replica keeps every replica busy
+    scheduler = MicroBatchScheduler(summarizer, batcher, workers=max(POOL_REPLICAS, 1))
+
+    ## Load the model when the worker starts instead of on the first request
+    if os.environ.get("CRISPY_WARM_UP"):
+        summarizer.warm_up()
 
+
+def batch_articles(article_list: ArticleBatch) -> List[dict]:
+    version = summarizer.tokenizer_version
     return [
-        {
-            "content": article.content,
-            "article_id": article.article_id,
-            "title": article.title,
-            "url": article.url,
-            "date": article.date,
-        }
-        for article in article_list.articles
+        _article(article, article_list, version) for article in article_list.articles
     ]
 
 
-def generate_summaries(articles: List[dict]) -> str:
+def _article(article: Article, article_list: ArticleBatch, version: str) -> dict:
+    return {
+        "content": article.content,
+        "article_id": article.article_id,
+        "title": article.title,
+        "url": article.url,
+        "date": article.date,
+        "input_ids": _input_ids(article, version),
+        ## Set once for the whole batch
+        "preset": article_list.generation_preset or None,
+        "latency_budget_ms": article_list.latency_budget_ms or None,
+    }
+
+
+def _input_ids(article: Article, version: str) -> Optional[List[int]]:
+    """
+    The article's pre-tokenized ids, or None to tokenize its content. Ids are
+    only used if they came from the same tokenizer and fit the model, so one
+    bad article can't fail the micro-batch it is generated in.
+    """
+    if not article.input_ids or article.tokenizer_version != version:
+        return None
+    input_ids = list(article.input_ids)
+    if not summarizer.accepts_input_ids(input_ids):
+        logging.warning(
+            "Tokenizing article %s, its input_ids don't fit the model",
+            article.article_id,
+        )
+        return None
+    return input_ids
+
+
+def parse_stream(frames: Iterator[bytes], article_list: ArticleBatch) -> Iterator[dict]:
+    """Articles of a framed request, parsed one frame at a time."""
+    version = summarizer.tokenizer_version
+    for data in frames:
+        article = Article()
+        with stage("parse"):
+            article.ParseFromString(data)
+        yield _article(article, article_list, version)
+
+
+def stream_response(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Summary frames of a framed request, each yielded as soon as its summary
+    is done. Articles are handed to the scheduler as their frames are read.
+    """
+    frames = read_frames(chunks)
+    ## The first frame only holds the batch settings
+    article_list = ArticleBatch()
+    with stage("parse"):
+        article_list.ParseFromString(next(frames, b""))
+    articles = parse_stream(frames, article_list)
+    for summary in stream_summaries(articles, article_list.stream_partial):
+        with stage("serialize"):
+            yield frame(summary)
+
+
+def _summary(article: dict, text: str, model_id="", partial=False) -> Summary:
+    return Summary(
+        article_id=article["article_id"],
+        summary=text,
+        title=article["title"],
+        url=article["url"],
+        date=article["date"],
+        model_id=model_id,
+        partial=partial,
+    )
+
+
+def _first_summary():
+    global first_summary_seconds
+    if first_summary_seconds is None:
+        first_summary_seconds = time.perf_counter() - IMPORT_STARTED
+        logger.info("Import to first summary: %.2fs", first_summary_seconds)
+        REGISTRY.set_gauge(
+            "first_summary_seconds",
+            first_summary_seconds,
+            "Time from importing the function to its first summary.",
+        )
+
+
+def stream_summaries(articles: Iterable[dict], partial=False) -> Iterator[Summary]:
+    """
+    Yields each article's Summary as soon as it is done, in completion
+    order rather than request order. With ``partial``, greedily decoded
+    summaries (the "fast" preset) are also streamed token by token as
+    Summary messages with ``partial`` set and the text so far.
+
+    ``articles`` is read on a separate thread, each article going to the
+    scheduler as soon as it arrives, so a client streaming articles in
+    gets summaries back while it is still sending.
+    """
+    events = queue.Queue()
+    submitted = []
+
+    def feed():
+        try:
+            for position, article in enumerate(articles):
+                submitted.append(article)
+                on_partial = None
+                if partial:
+                    on_partial = lambda text, position=position: events.put(
+                        ("partial", position, text)
+                    )
+                future = scheduler.submit(
+                    article["content"],
+                    article["input_ids"],
+                    article["preset"],
+                    article["latency_budget_ms"],
+                    on_partial,
+                )
+                future.add_done_callback(
+                    lambda future, position=position: events.put(
+                        ("done", position, future)
+                    )
+                )
+        except Exception as e:
+            events.put(("failed", None, e))
+        else:
+            events.put(("fed", None, None))
+
+    ## Parsing on the feeder thread records into this request's profile
+    threading.Thread(
+        target=contextvars.copy_context().run, args=(feed,), daemon=True
+    ).start()
+
+    profile = current_profile()
+    fed, completed = False, 0
+    while not fed or completed < len(submitted):
+        kind, position, value = events.get()
+        if kind == "failed":
+            raise value
+        if kind == "fed":
+            fed = True
+        elif kind == "partial":
+            yield _summary(submitted[position], value, partial=True)
+        else:
+            text, model_id, batch = value.result()
+            if profile is not None:
+                profile.attach(batch)
+            completed += 1
+            _first_summary()
+            yield _summary(submitted[position], text, model_id)
+
+
+def summarize_batch(article_list: ArticleBatch) -> bytes:
+    """
+    Direct path from a parsed ArticleBatch to the serialized SummaryBatch.
+    Contents and ids go from the messages straight to the scheduler, with no
+    per-article dict, and summaries are filled into a SummaryBatch that is
+    allocated up front, in request order.
+    """
+    version = summarizer.tokenizer_version
+    preset = article_list.generation_preset or None
+    latency_budget_ms = article_list.latency_budget_ms or None
+    articles = article_list.articles
+    futures = [
+        scheduler.submit(
+            article.content,
+            _input_ids(article, version),
+            preset,
+            latency_budget_ms,
+        )
+        for article in articles
+    ]
+
     summary_list = SummaryBatch()
+    summaries = [
+        summary_list.summaries.add(
+            article_id=article.article_id,
+            title=article.title,
+            url=article.url,
+            date=article.date,
+        )
+        for article in articles
+    ]
+    profile = current_profile()
+    for summary, future in zip(summaries, futures):
+        summary.summary, summary.model_id, batch = future.result()
+        if profile is not None:
+            profile.attach(batch)
+    with stage("serialize"):
+        serialized = summary_list.SerializeToString()
 
-    dataloader = DataLoader(articles, batch_size=3, shuffle=False)
-
-    for batch in dataloader:
-        summaries = summarizer(batch["content"])
-        for i in range(len(batch["content"])):
-            print(i)
-            summary = Summary(
-                article_id=batch["article_id"][i],
-                summary=summaries[i],
-                title=batch["title"][i],
-                url=batch["url"][i],
-                date=batch["date"][i],
-            )
-            summary_list.summaries.append(summary)
-    return summary_list.SerializeToString()
+    _first_summary()
+    return serialized
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info("Python HTTP trigger function processed a request.")
 
+    if req.method == "GET":
+        ## Prometheus scrape of the stage histograms and counters
+        return func.HttpResponse(
+            REGISTRY.render(),
+            headers={"Content-Type": "text/plain; version=0.0.4"},
+        )
+
     req_body = req.get_body()
 
     logging.info("Request body: %s", req_body[:20])
     if req_body:
         try:
-            articles = parse_request(req)
-            summaries = generate_summaries(articles)
+            streamed = req.headers.get("Content-Type", "").startswith(
+                STREAM_CONTENT_TYPE
+            )
+            compress = accepts(req.headers.get("Accept-Encoding"))
+            with profiling(Profile()) as profile:
+                if req.headers.get("Content-Encoding", "").lower() == ZSTD_ENCODING:
+                    with stage("parse"):
+                        req_body = codec.decompress(req_body)
+                if streamed:
+                    ## The Functions host buffers the response, so the frames
+                    ## are joined here; the request is still parsed and
+                    ## summarized incrementally
+                    summaries = b"".join(stream_response([req_body]))
+                else:
+                    article_list = ArticleBatch()
+                    with stage("parse"):
+                        article_list.ParseFromString(req_body)
+                    summaries = summarize_batch(article_list)
+                if compress:
+                    with stage("serialize"):
+                        summaries = codec.compress(summaries)
+            ## Batch stages were observed by the scheduler, this adds parse
+            ## and serialize
+            REGISTRY.observe(profile)
             headers = {
-                "Content-Type": "text/plain",
+                "Content-Type": STREAM_CONTENT_TYPE if streamed else "text/plain",
                 "Access-Control-Allow-Origin": "*",
+                **profile.headers(),
+                **codec.advertised_headers(),
             }
+            if compress:
+                headers["Content-Encoding"] = ZSTD_ENCODING
             return func.HttpResponse(
                 summaries,
                 headers=headers,
             )
+        except DecompressionError as e:
+            ## 415 and the advertised headers tell the client to stop compressing
+            return func.HttpResponse(
+                str(e), status_code=415, headers=codec.advertised_headers()
+            )
         except Exception as e:
             print(traceback.format_exc())
             return func.HttpResponse(str(e), status_code=400)
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: article.proto
-
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
 from google.protobuf import descriptor as _descriptor
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
+from google.protobuf import descriptor_pool as _descriptor_pool
 from google.protobuf import symbol_database as _symbol_database
 # @@protoc_insertion_point(imports)
 
@@ -13,127 +13,15 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor.FileDescriptor(
-  name='article.proto',
-  package='',
-  syntax='proto3',
-  serialized_options=None,
-  create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\rarticle.proto\"X\n\x07\x41rticle\x12\r\n\x05title\x18\x01 \x01(\t\x12\x12\n\narticle_id\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x04 \x01(\t\x12\x0b\n\x03url\x18\x05 \x01(\t\"*\n\x0c\x41rticleBatch\x12\x1a\n\x08\x61rticles\x18\x01 \x03(\x0b\x32\x08.Articleb\x06proto3'
-)
-
-
-
-
-_ARTICLE = _descriptor.Descriptor(
-  name='Article',
-  full_name='Article',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  create_key=_descriptor._internal_create_key,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='title', full_name='Article.title', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
-    _descriptor.FieldDescriptor(
-      name='article_id', full_name='Article.article_id', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
-    _descriptor.FieldDescriptor(
-      name='content', full_name='Article.content', index=2,
-      number=3, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
-    _descriptor.FieldDescriptor(
-      name='date', full_name='Article.date', index=3,
-      number=4, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
-    _descriptor.FieldDescriptor(
-      name='url', full_name='Article.url', index=4,
-      number=5, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=17,
-  serialized_end=105,
-)
-
-
-_ARTICLEBATCH = _descriptor.Descriptor(
-  name='ArticleBatch',
-  full_name='ArticleBatch',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  create_key=_descriptor._internal_create_key,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='articles', full_name='ArticleBatch.articles', index=0,
-      number=1, type=11, cpp_type=10, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=107,
-  serialized_end=149,
-)
-
-_ARTICLEBATCH.fields_by_name['articles'].message_type = _ARTICLE
-DESCRIPTOR.message_types_by_name['Article'] = _ARTICLE
-DESCRIPTOR.message_types_by_name['ArticleBatch'] = _ARTICLEBATCH
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-Article = _reflection.GeneratedProtocolMessageType('Article', (_message.Message,), {
-  'DESCRIPTOR' : _ARTICLE,
-  '__module__' : 'article_pb2'
-  # @@protoc_insertion_point(class_scope:Article)
-  })
-_sym_db.RegisterMessage(Article)
-
-ArticleBatch = _reflection.GeneratedProtocolMessageType('ArticleBatch', (_message.Message,), {
-  'DESCRIPTOR' : _ARTICLEBATCH,
-  '__module__' : 'article_pb2'
-  # @@protoc_insertion_point(class_scope:ArticleBatch)
-  })
-_sym_db.RegisterMessage(ArticleBatch)
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rarticle.proto\"\x86\x01\n\x07\x41rticle\x12\r\n\x05title\x18\x01 \x01(\t\x12\x12\n\narticle_id\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x04 \x01(\t\x12\x0b\n\x03url\x18\x05 \x01(\t\x12\x11\n\tinput_ids\x18\x06 \x03(\x05\x12\x19\n\x11tokenizer_version\x18\x07 \x01(\t\"x\n\x0c\x41rticleBatch\x12\x1a\n\x08\x61rticles\x18\x01 \x03(\x0b\x32\x08.Article\x12\x19\n\x11generation_preset\x18\x02 \x01(\t\x12\x19\n\x11latency_budget_ms\x18\x03 \x01(\r\x12\x16\n\x0estream_partial\x18\x04 \x01(\x08\x62\x06proto3')
 
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'article_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
 
+  DESCRIPTOR._options = None
+  _ARTICLE._serialized_start=18
+  _ARTICLE._serialized_end=152
+  _ARTICLEBATCH._serialized_start=154
+  _ARTICLEBATCH._serialized_end=274
 # @@protoc_insertion_point(module_scope)
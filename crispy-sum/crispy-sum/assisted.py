@@ -0,0 +1,192 @@
+import copy
+import functools
+import os
+import threading
+
+import torch
+from transformers import LogitsProcessorList
+
+from .backends import TorchBackend
+from .precision import autocast, quantize_int8
+
+
+def _crop(past, length: int):
+    """Drops self-attention cache entries past ``length``; cross-attention stays."""
+    return tuple(
+        (self_key[:, :, :length], self_value[:, :, :length], *cross)
+        for self_key, self_value, *cross in past
+    )
+
+
+class _Decoder:
+    """One model's encoder output and decoder cache for a single article."""
+
+    def __init__(self, model, input_ids, attention_mask):
+        self.model = model
+        self.attention_mask = attention_mask
+        self.encoder_outputs = model.get_encoder()(
+            input_ids=input_ids, attention_mask=attention_mask
+        )
+        self.past = None
+        self.length = 0
+
+    def logits(self, tokens):
+        """Feeds the tokens not yet in the cache and returns their logits."""
+        outputs = self.model(
+            encoder_outputs=self.encoder_outputs,
+            attention_mask=self.attention_mask,
+            decoder_input_ids=torch.tensor([tokens[self.length :]]),
+            past_key_values=self.past,
+            use_cache=True,
+        )
+        self.past = outputs.past_key_values
+        self.length = len(tokens)
+        return outputs.logits[0]
+
+    def rewind(self, length: int):
+        if self.length > length:
+            self.past = _crop(self.past, length)
+            self.length = length
+
+
+class AssistedBackend(TorchBackend):
+    """
+    Assisted (speculative) greedy decoding. A small draft model that shares
+    the BART vocabulary proposes draft_tokens tokens one at a time, and the
+    full model scores all of them in one forward pass. The longest prefix
+    matching the full model's own greedy choice is accepted, plus the full
+    model's token at the first mismatch. The output is the full model's
+    greedy summary; only the number of full-model passes shrinks.
+
+    Decoding is greedy and one article at a time, so num_beams is ignored.
+    Like transformers' heuristic, the draft length grows by 2 after a fully
+    accepted draft and shrinks by 1 otherwise.
+    """
+
+    name = "assisted"
+
+    draft_tokens = int(os.environ.get("CRISPY_DRAFT_TOKENS", 5))
+
+    def __init__(self, model, precision: str = "fp32", draft=None):
+        if draft is None:
+            raise ValueError("The assisted backend needs a draft model")
+        super().__init__(model, precision)
+        self.draft = quantize_int8(draft) if precision == "int8" else draft
+        self.steps = 0
+        self.generated = 0
+        self.accepted = 0
+        self.drafted = 0
+        self._lock = threading.Lock()
+
+    def _logits_processor(self, input_ids, max_length, min_length):
+        config = copy.deepcopy(self.model.generation_config)
+        config.max_length = max_length
+        config.min_length = min_length
+        return self.model._get_logits_processor(
+            generation_config=config,
+            input_ids_seq_length=1,
+            encoder_input_ids=input_ids,
+            prefix_allowed_tokens_fn=None,
+            logits_processor=LogitsProcessorList(),
+        )
+
+    def _next_token(self, processor, sequence, logits) -> int:
+        scores = processor(torch.tensor([sequence]), logits[None].float())
+        return int(scores.argmax(-1))
+
+    def _generate_one(
+        self, input_ids, attention_mask, max_length, min_length, on_step=None
+    ):
+        config = self.model.generation_config
+        processor = self._logits_processor(input_ids, max_length, min_length)
+        target = _Decoder(self.model, input_ids, attention_mask)
+        draft = _Decoder(self.draft, input_ids, attention_mask)
+
+        sequence = [config.decoder_start_token_id]
+        draft_tokens = self.draft_tokens
+        steps = accepted = drafted = 0
+        ## BART's decoder start token is also its EOS token
+        finished = False
+        while len(sequence) < max_length and not finished:
+            proposal = list(sequence)
+            for _ in range(min(draft_tokens, max_length - len(sequence) - 1)):
+                logits = draft.logits(proposal)[-1]
+                token = self._next_token(processor, proposal, logits)
+                proposal.append(token)
+                if token == config.eos_token_id:
+                    break
+            guesses = proposal[len(sequence) :]
+
+            ## One pass scores the last accepted token and every guess
+            logits = target.logits(proposal)[-len(guesses) - 1 :]
+            matched = 0
+            for position, position_logits in enumerate(logits):
+                token = self._next_token(processor, sequence, position_logits)
+                sequence.append(token)
+                if position == len(guesses) or token != guesses[position]:
+                    break
+                matched += 1
+                if token == config.eos_token_id:
+                    break
+            finished = sequence[-1] == config.eos_token_id
+
+            ## Caches must not hold tokens past the accepted sequence
+            target.rewind(len(sequence) - 1)
+            draft.rewind(len(sequence) - 1)
+            if on_step is not None:
+                on_step(sequence)
+            steps += 1
+            accepted += matched
+            drafted += len(guesses)
+            if guesses and matched == len(guesses):
+                draft_tokens += 2
+            else:
+                draft_tokens = max(1, draft_tokens - 1)
+
+        with self._lock:
+            self.steps += steps
+            self.generated += len(sequence) - 1
+            self.accepted += accepted
+            self.drafted += drafted
+        return sequence[:max_length]
+
+    def generate(
+        self,
+        input_ids,
+        attention_mask,
+        max_length=120,
+        min_length=40,
+        num_beams=None,
+        early_stopping=None,
+        on_step=None,
+    ):
+        with torch.no_grad(), autocast(self.precision):
+            sequences = []
+            for row, (ids, mask) in enumerate(zip(input_ids, attention_mask)):
+                ## Drop the padding, each article decodes on its own
+                ids = ids[mask.bool()][None]
+                mask = torch.ones_like(ids)
+                step = on_step and functools.partial(on_step, row)
+                sequences.append(
+                    self._generate_one(ids, mask, max_length, min_length, step)
+                )
+
+        pad = self.model.config.pad_token_id
+        width = max(len(sequence) for sequence in sequences)
+        return torch.tensor(
+            [sequence + [pad] * (width - len(sequence)) for sequence in sequences]
+        )
+
+    def beams(self, num_beams=None) -> int:
+        return 1
+
+    def stats(self) -> dict:
+        """Tokens produced per full-model pass and the draft acceptance rate."""
+        with self._lock:
+            steps, generated = self.steps, self.generated
+            accepted, drafted = self.accepted, self.drafted
+        return {
+            "steps": steps,
+            "tokens_per_step": generated / steps if steps else 0.0,
+            "acceptance_rate": accepted / drafted if drafted else 0.0,
+        }
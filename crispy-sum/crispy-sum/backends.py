@@ -0,0 +1,111 @@
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+from .metrics import time_module
+from .precision import autocast, quantize_int8
+
+
+class SummarizerBackend:
+    """
+    Interface for the inference engines behind CrispySummarizer. A backend
+    takes padded input ids and attention mask tensors and returns the
+    generated summary ids, one row per article.
+
+    With greedy decoding (one beam), ``on_step(row, ids)`` is called with
+    each row's ids so far after every decoding step, for token streaming.
+    Beam search only settles its hypotheses at the end, so it never calls it.
+    """
+
+    name = ""
+
+    def __init__(self, model, precision: str = "fp32"):
+        self.model = model
+        self.precision = precision
+
+    def generate(
+        self,
+        input_ids,
+        attention_mask,
+        max_length=120,
+        min_length=40,
+        num_beams=None,
+        early_stopping=None,
+        on_step=None,
+    ):
+        """``num_beams`` and ``early_stopping`` default to the model's config."""
+        raise NotImplementedError
+
+    def beams(self, num_beams=None) -> int:
+        """Sequences decoded per article for a num_beams setting."""
+        return num_beams or self.model.generation_config.num_beams or 1
+
+
+class _StepCallback(StoppingCriteria):
+    """Never stops generation, only reports every row after each step."""
+
+    def __init__(self, on_step):
+        self.on_step = on_step
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        for row, ids in enumerate(input_ids.tolist()):
+            self.on_step(row, ids)
+        return False
+
+
+class TorchBackend(SummarizerBackend):
+    """The reference backend: transformers' model.generate on PyTorch."""
+
+    name = "torch"
+
+    def __init__(self, model, precision: str = "fp32"):
+        if precision == "int8":
+            model = quantize_int8(model)
+        super().__init__(model, precision)
+        time_module(self.model.get_encoder(), "encoder")
+
+    def generate(
+        self,
+        input_ids,
+        attention_mask,
+        max_length=120,
+        min_length=40,
+        num_beams=None,
+        early_stopping=None,
+        on_step=None,
+    ):
+        ## generate() would copy None over the model's generation config
+        settings = {"num_beams": num_beams, "early_stopping": early_stopping}
+        if on_step is not None and self.beams(num_beams) == 1:
+            settings["stopping_criteria"] = StoppingCriteriaList(
+                [_StepCallback(on_step)]
+            )
+        with torch.no_grad(), autocast(self.precision):
+            return self.model.generate(
+                input_ids,
+                attention_mask=attention_mask,
+                max_length=max_length,
+                min_length=min_length,
+                **{key: value for key, value in settings.items() if value is not None},
+            )
+
+
+def create_backend(
+    name: str, model, precision: str = "fp32", draft=None
+) -> SummarizerBackend:
+    """
+    Instantiates a backend by name. onnxruntime is only imported when used.
+    ``draft`` is the draft model of the "assisted" backend.
+    """
+    if name == TorchBackend.name:
+        return TorchBackend(model, precision)
+    if name == "onnx":
+        from .onnx_backend import OnnxBackend
+
+        return OnnxBackend(model, precision)
+    if name == "assisted":
+        from .assisted import AssistedBackend
+
+        return AssistedBackend(model, precision, draft)
+    raise ValueError(
+        f"Unknown backend {name!r}, expected 'torch', 'onnx' or 'assisted'"
+    )
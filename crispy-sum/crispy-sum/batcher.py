@@ -0,0 +1,149 @@
+import os
+import resource
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        ## No procfs: fall back to the high-water mark (KiB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRSSSampler:
+    """Samples the RSS on a background thread and keeps the highest value."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.baseline = self.peak = current_rss()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop_event.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    def _sample(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+class TokenBudgetBatcher:
+    """
+    Packs articles into batches bounded by a padded-token budget and a peak
+    memory ceiling.
+
+    The memory cost of a batch is modelled as a fixed part plus bytes per
+    padded token (batch size * longest article), learned from the RSS peaks
+    observed while the most recent batches ran, so batch sizes follow what
+    this host actually spends rather than a fixed constant.
+
+    The line is fitted to those batches and then raised until it covers
+    every one of them. Once a large batch has run, the allocator keeps its
+    memory and later batches barely move the RSS, but the large batch still
+    bounds the estimate until it leaves the window. The first batch is not
+    sampled: it can pay for one-off setup such as faulting in the weights.
+    """
+
+    token_budget = int(os.environ.get("CRISPY_TOKEN_BUDGET", 4096))
+    memory_ceiling_mb = int(os.environ.get("CRISPY_MEMORY_CEILING_MB", 0))
+    max_batch_size = int(os.environ.get("CRISPY_MAX_BATCH_SIZE", 16))
+
+    ## Batches the cost model is fitted to
+    window = 64
+
+    def __init__(self, token_budget=None, memory_ceiling_mb=None, max_batch_size=None):
+        if token_budget is not None:
+            self.token_budget = token_budget
+        if memory_ceiling_mb is not None:
+            self.memory_ceiling_mb = memory_ceiling_mb
+        if max_batch_size is not None:
+            self.max_batch_size = max_batch_size
+
+        self.fixed_bytes = 0.0
+        self.bytes_per_token = None
+        self._samples = deque(maxlen=self.window)
+        self._first = True
+        self._lock = threading.Lock()
+
+    def _memory_allows(self, padded_tokens: int) -> bool:
+        if not self.memory_ceiling_mb or self.bytes_per_token is None:
+            return True
+        predicted = (
+            current_rss() + self.fixed_bytes + self.bytes_per_token * padded_tokens
+        )
+        return predicted <= self.memory_ceiling_mb * 1024 * 1024
+
+    def _fits(self, size: int, longest: int) -> bool:
+        padded_tokens = size * longest
+        return (
+            size <= self.max_batch_size
+            and padded_tokens <= self.token_budget
+            and self._memory_allows(padded_tokens)
+        )
+
+    def batches(self, lengths: List[int]) -> Iterator[List[int]]:
+        """
+        Yields batches of indices into ``lengths``, shortest articles first.
+        Batches are planned lazily, so each one is sized with the cost model
+        as updated by the batches before it. An article that exceeds the
+        budget on its own is still yielded, as a batch of one.
+        """
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batch = []
+        for i in order:
+            if batch and not self._fits(len(batch) + 1, lengths[i]):
+                yield batch
+                batch = []
+            batch.append(i)
+        if batch:
+            yield batch
+
+    @contextmanager
+    def track(self, padded_tokens: int):
+        """Measures the peak RSS of one batch and updates the cost model."""
+        with PeakRSSSampler() as sampler:
+            yield
+        self.observe(padded_tokens, sampler.peak - sampler.baseline)
+
+    def observe(self, padded_tokens: int, peak_bytes: int):
+        if padded_tokens <= 0:
+            return
+        with self._lock:
+            if self._first:
+                self._first = False
+                return
+            self._samples.append((padded_tokens, max(peak_bytes, 0)))
+            self.fixed_bytes, self.bytes_per_token = _covering_line(self._samples)
+
+
+def _covering_line(samples) -> Tuple[float, float]:
+    """(fixed, per token) of a least squares line raised to cover every sample."""
+    mean_tokens = sum(tokens for tokens, _ in samples) / len(samples)
+    mean_bytes = sum(peak for _, peak in samples) / len(samples)
+    variance = sum((tokens - mean_tokens) ** 2 for tokens, _ in samples)
+    if variance:
+        covariance = sum(
+            (tokens - mean_tokens) * (peak - mean_bytes) for tokens, peak in samples
+        )
+        per_token = max(covariance / variance, 0.0)
+    else:
+        ## A single batch size: proportional to its tokens
+        per_token = max(peak / tokens for tokens, peak in samples)
+    fixed = max(0.0, max(peak - per_token * tokens for tokens, peak in samples))
+    return fixed, per_token
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def content_hash(content: str) -> str:
+    """Hash of the article text with unicode and whitespace normalized."""
+    normalized = " ".join(unicodedata.normalize("NFC", content).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Content-addressed summary cache. Keys combine the normalized article
+    hash with the model id and generation params, so a new model or new
+    settings never serve stale summaries.
+
+    Lookups go to a bounded in-memory LRU first, then to an optional SQLite
+    file shared by the worker processes on the host. The SQLite tier is
+    evicted least recently used first once it grows past max_disk_mb.
+    """
+
+    memory_entries = int(os.environ.get("CRISPY_CACHE_ENTRIES", 4096))
+    max_disk_mb = int(os.environ.get("CRISPY_CACHE_MAX_MB", 256))
+
+    def __init__(self, path: Optional[str] = None, memory_entries=None, max_disk_mb=None):
+        if memory_entries is not None:
+            self.memory_entries = memory_entries
+        if max_disk_mb is not None:
+            self.max_disk_mb = max_disk_mb
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, summary TEXT, size INTEGER, last_used REAL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries(last_used)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(content: str, params: dict) -> str:
+        return hashlib.sha256(
+            (content_hash(content) + json.dumps(params, sort_keys=True)).encode("utf-8")
+        ).hexdigest()
+
+    def _remember(self, key: str, summary: str):
+        self._memory[key] = summary
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+            missing = [key for key in set(keys) if key not in found]
+            if self._db is not None and missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT key, summary FROM summaries WHERE key IN ({placeholders})",
+                    missing,
+                ).fetchall()
+                if rows:
+                    self._db.executemany(
+                        "UPDATE summaries SET last_used = ? WHERE key = ?",
+                        [(time.time(), key) for key, _ in rows],
+                    )
+                    self._db.commit()
+                for key, summary in rows:
+                    found[key] = summary
+                    self._remember(key, summary)
+
+            return [found.get(key) for key in keys]
+
+    def put_many(self, summaries: Dict[str, str]):
+        with self._lock:
+            for key, summary in summaries.items():
+                self._remember(key, summary)
+            if self._db is None or not summaries:
+                return
+
+            now = time.time()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)",
+                [
+                    (key, summary, len(summary.encode("utf-8")), now)
+                    for key, summary in summaries.items()
+                ],
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        max_bytes = self.max_disk_mb * 1024 * 1024
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()
+        if total <= max_bytes:
+            return
+        ## Walk from the least recently used entry until enough is freed
+        freed, stale = 0, []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM summaries ORDER BY last_used"
+        ):
+            stale.append((key,))
+            freed += size
+            if total - freed <= max_bytes:
+                break
+        self._db.executemany("DELETE FROM summaries WHERE key = ?", stale)
@@ -0,0 +1,109 @@
+from typing import Iterable, Iterator, Optional
+
+import zstandard
+
+## zstd content coding of request and response bodies (RFC 8878). The
+## sender sets Content-Encoding: zstd, and Accept-Encoding: zstd asks for a
+## compressed response. Bodies can use a shared dictionary trained on news
+## text (tools/train_zstd_dictionary.py); its id is in every frame header,
+## so a peer with another dictionary, or none, fails with a
+## DecompressionError instead of returning garbage.
+ZSTD_ENCODING = "zstd"
+LEVEL = 3
+
+## The summarizer advertises the encodings it accepts on every response
+## (Accept-Encoding, as in RFC 7694) along with its dictionary id, so the
+## client only compresses once both sides are known to agree
+DICTIONARY_HEADER = "X-Zstd-Dictionary-Id"
+
+
+class DecompressionError(ValueError):
+    """A body that is not zstd, or was compressed with another dictionary."""
+
+
+def accepts(accept_encoding: Optional[str], encoding: str = ZSTD_ENCODING) -> bool:
+    """Whether an Accept-Encoding header value allows the encoding."""
+    for token in (accept_encoding or "").split(","):
+        name, _, params = token.partition(";")
+        if name.strip().lower() == encoding:
+            ## "zstd;q=0" explicitly refuses it
+            _, _, quality = params.replace(" ", "").partition("q=")
+            try:
+                return float(quality or 1) > 0
+            except ValueError:
+                return False
+    return False
+
+
+class ZstdCodec:
+    """
+    zstd compression with an optional dictionary. Compressors are made per
+    call, the zstandard objects must not be shared between threads; the
+    dictionary is only loaded once.
+    """
+
+    def __init__(self, dictionary_path: Optional[str] = None, level: int = LEVEL):
+        self.level = level
+        self.dictionary = None
+        if dictionary_path:
+            with open(dictionary_path, "rb") as f:
+                self.dictionary = zstandard.ZstdCompressionDict(f.read())
+            self.dictionary.precompute_compress(level=level)
+
+    @property
+    def dictionary_id(self) -> int:
+        return self.dictionary.dict_id() if self.dictionary is not None else 0
+
+    def advertised_headers(self) -> dict:
+        """Response headers telling clients which bodies this side can read."""
+        return {
+            "Accept-Encoding": ZSTD_ENCODING,
+            DICTIONARY_HEADER: str(self.dictionary_id),
+        }
+
+    def agrees(self, headers) -> bool:
+        """Whether a peer's advertised headers match this codec."""
+        dictionary_id = headers.get(DICTIONARY_HEADER)
+        return accepts(headers.get("Accept-Encoding")) and dictionary_id == str(
+            self.dictionary_id
+        )
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        return zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+
+    def _decompressor(self) -> zstandard.ZstdDecompressor:
+        return zstandard.ZstdDecompressor(dict_data=self.dictionary)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor().compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return b"".join(self.decompress_chunks([data]))
+
+    def compress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        One zstd frame over all chunks, flushed after each so the peer can
+        decode every chunk, e.g. a length-delimited message, on arrival.
+        """
+        compressor = self._compressor().compressobj()
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            data += compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def decompress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = self._decompressor().decompressobj()
+        try:
+            for chunk in chunks:
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+        except zstandard.ZstdError as e:
+            raise DecompressionError(
+                f"Cannot decompress zstd body (local dictionary id "
+                f"{self.dictionary_id}): {e}"
+            ) from e
+        if not decompressor.eof:
+            raise DecompressionError("zstd body ended inside a frame")
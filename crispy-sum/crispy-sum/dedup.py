@@ -0,0 +1,136 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+## Modulus of the MinHash permutations, a Mersenne prime above 2**32
+_PRIME = np.uint64((1 << 61) - 1)
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Lower-cased word ``size``-grams of the text, the unit of similarity."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of recently summarized articles. Syndicated and
+    lightly rewritten stories share most of their word shingles, so an
+    article whose estimated Jaccard similarity to an indexed one is at
+    least threshold reuses that article's summary instead of running the
+    model.
+
+    Signatures of num_permutations minimum hashes are split into bands;
+    articles sharing any band are candidates, and a candidate matches if
+    the full signatures agree on at least threshold of their positions.
+    Entries are scoped (model and generation params), expire after
+    window_seconds and are evicted oldest first past max_entries, so memory
+    stays bounded at roughly max_entries * (signature + summary).
+    """
+
+    threshold = float(os.environ.get("CRISPY_NEAR_DUP_THRESHOLD", 0.8))
+    window_seconds = float(os.environ.get("CRISPY_NEAR_DUP_WINDOW_S", 6 * 3600))
+    max_entries = int(os.environ.get("CRISPY_NEAR_DUP_ENTRIES", 10000))
+
+    num_permutations = 128
+    ## 16 bands of 8 rows make 95% of pairs at 0.8 similarity candidates
+    bands = 16
+
+    def __init__(self, threshold=None, window_seconds=None, max_entries=None):
+        if threshold is not None:
+            self.threshold = threshold
+        if window_seconds is not None:
+            self.window_seconds = window_seconds
+        if max_entries is not None:
+            self.max_entries = max_entries
+
+        ## Fixed seed: signatures must agree across processes and restarts
+        generator = np.random.RandomState(1)
+        self._a = generator.randint(1, 1 << 61, self.num_permutations, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 61, self.num_permutations, dtype=np.uint64)
+
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the text, None if it has no words."""
+        units = shingles(text)
+        if not units:
+            return None
+        hashes = np.fromiter(
+            (zlib.crc32(unit.encode("utf-8")) for unit in units),
+            dtype=np.uint64,
+            count=len(units),
+        )
+        ## Products wrap around 2**64; still a good permutation family
+        permuted = (hashes[:, None] * self._a + self._b) % _PRIME
+        return (permuted & np.uint64(0xFFFFFFFF)).min(axis=0).astype(np.uint32)
+
+    def _bands(self, scope: str, signature: np.ndarray):
+        rows = self.num_permutations // self.bands
+        return [
+            (scope, band, signature[band * rows : (band + 1) * rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def find(self, text: str, scope: str = "") -> Optional[str]:
+        """Summary of the most similar indexed article in scope, if any."""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            self._expire()
+            candidates = set()
+            for band in self._bands(scope, signature):
+                candidates.update(self._buckets.get(band, ()))
+            best, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                _, _, other, summary = self._entries[entry_id]
+                similarity = float(np.mean(signature == other))
+                if similarity >= best_similarity:
+                    best, best_similarity = summary, similarity
+            if best is not None:
+                self.hits += 1
+            return best
+
+    def add(self, text: str, summary: str, scope: str = ""):
+        signature = self.signature(text)
+        if signature is None:
+            return
+        bands = self._bands(scope, signature)
+        with self._lock:
+            entry_id = self._ids
+            self._ids += 1
+            self._entries[entry_id] = (time.monotonic(), bands, signature, summary)
+            for band in bands:
+                self._buckets.setdefault(band, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+            self._expire()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self._entries and next(iter(self._entries.values()))[0] < cutoff:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        entry_id, (_, bands, _, _) = self._entries.popitem(last=False)
+        for band in bands:
+            bucket = self._buckets[band]
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[band]
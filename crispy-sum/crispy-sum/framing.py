@@ -0,0 +1,76 @@
+from typing import Iterable, Iterator, Type, TypeVar
+
+## Length-delimited protobuf framing, the format of writeDelimitedTo: every
+## message is preceded by its size as a base-128 varint, so neither side has
+## to hold a whole ArticleBatch or SummaryBatch in memory. A stream request
+## is an ArticleBatch frame with only the batch settings, then one Article
+## frame per article; the response is one Summary frame per article, in the
+## order the summaries complete.
+STREAM_CONTENT_TYPE = "application/x-protobuf-stream"
+
+## A frame larger than this is taken as a corrupt stream, not buffered
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+Message = TypeVar("Message")
+
+
+def encode_varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _decode_varint(buffer, start: int):
+    """(value, end) of the varint at start, or None if it is incomplete."""
+    value = shift = 0
+    for end in range(start, min(len(buffer), start + 10)):
+        byte = buffer[end]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, end + 1
+        shift += 7
+    if len(buffer) - start >= 10:
+        raise ValueError("Malformed frame length")
+    return None
+
+
+def frame(message) -> bytes:
+    data = message.SerializeToString()
+    return encode_varint(len(data)) + data
+
+
+def read_frames(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Yields the payload of every frame as soon as it is complete. Only the
+    unfinished frame is buffered, however the chunks are cut.
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            header = _decode_varint(buffer, start)
+            if header is None:
+                break
+            size, begin = header
+            if size > MAX_FRAME_BYTES:
+                raise ValueError(f"Frame of {size} bytes exceeds {MAX_FRAME_BYTES}")
+            if len(buffer) - begin < size:
+                break
+            yield bytes(buffer[begin : begin + size])
+            start = begin + size
+        del buffer[:start]
+    if buffer:
+        raise ValueError(f"Stream ended inside a frame ({len(buffer)} bytes left)")
+
+
+def read_messages(
+    chunks: Iterable[bytes], message_class: Type[Message]
+) -> Iterator[Message]:
+    for data in read_frames(chunks):
+        message = message_class()
+        message.ParseFromString(data)
+        yield message
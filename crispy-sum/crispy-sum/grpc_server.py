@@ -0,0 +1,89 @@
+import itertools
+import logging
+import os
+from concurrent import futures
+from typing import Iterator
+
+import grpc
+
+from . import batch_articles, stream_summaries, summarize_batch, summarizer
+from .article_pb2 import ArticleBatch
+from .framing import MAX_FRAME_BYTES
+from .metrics import REGISTRY, Profile, profiling
+from .summary_pb2 import Summary
+
+logger = logging.getLogger(__name__)
+
+ADDRESS = os.environ.get("CRISPY_GRPC_ADDRESS", "[::]:50051")
+## Request threads mostly wait on the scheduler, which batches across them
+WORKERS = int(os.environ.get("CRISPY_GRPC_WORKERS", 16))
+
+
+class SummarizerService:
+    """
+    The Summarizer service of summarizer.proto, on the same summarizer and
+    micro-batch scheduler as the HTTP trigger. The handlers are registered
+    generically with the existing message classes, so no generated stubs
+    are needed.
+    """
+
+    def Summarize(self, request: ArticleBatch, context) -> bytes:
+        with profiling(Profile()) as profile:
+            summaries = summarize_batch(request)
+        REGISTRY.observe(profile)
+        context.set_trailing_metadata(
+            [(key.lower(), value) for key, value in profile.headers().items()]
+        )
+        ## Already serialized, the response serializer passes it through
+        return summaries
+
+    def SummarizeStream(
+        self, requests: Iterator[ArticleBatch], context
+    ) -> Iterator[Summary]:
+        first = next(requests, None)
+        if first is None:
+            return
+        ## Partial text is asked for once, by the first message of the call
+        articles = (
+            article
+            for article_list in itertools.chain([first], requests)
+            for article in batch_articles(article_list)
+        )
+        yield from stream_summaries(articles, first.stream_partial)
+
+    def handler(self) -> grpc.GenericRpcHandler:
+        return grpc.method_handlers_generic_handler(
+            "Summarizer",
+            {
+                "Summarize": grpc.unary_unary_rpc_method_handler(
+                    self.Summarize, request_deserializer=ArticleBatch.FromString
+                ),
+                "SummarizeStream": grpc.stream_stream_rpc_method_handler(
+                    self.SummarizeStream,
+                    request_deserializer=ArticleBatch.FromString,
+                    response_serializer=Summary.SerializeToString,
+                ),
+            },
+        )
+
+
+def serve(address: str = ADDRESS, workers: int = WORKERS) -> grpc.Server:
+    """Starts the server with the model loaded and warmed up."""
+    summarizer.warm_up()
+    options = [
+        ("grpc.max_receive_message_length", MAX_FRAME_BYTES),
+        ("grpc.max_send_message_length", MAX_FRAME_BYTES),
+    ]
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=workers), options=options
+    )
+    server.add_generic_rpc_handlers((SummarizerService().handler(),))
+    server.add_insecure_port(address)
+    server.start()
+    logger.info("Summarizer gRPC server listening on %s", address)
+    return server
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    serve().wait_for_termination()
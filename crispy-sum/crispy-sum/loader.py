@@ -0,0 +1,283 @@
+import copy
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+import torch
+import transformers
+from safetensors.torch import save_file
+from transformers import (
+    BartConfig,
+    BartForConditionalGeneration,
+    BartTokenizer,
+    BartTokenizerFast,
+    GenerationConfig,
+)
+
+from .precision import quantize_int8
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = os.environ.get("CRISPY_MODEL", "Yale-LILY/brio-cnndm-uncased")
+## Smaller tier for short articles and backlog, e.g.
+## sshleifer/distilbart-cnn-12-6; off by default, since it changes the
+## summaries of short articles and loads a second model
+DISTILLED_MODEL_NAME = os.environ.get("CRISPY_DISTILLED_MODEL", "")
+CACHE_DIR = os.environ.get(
+    "CRISPY_MODEL_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "crispy-sum", "models"),
+)
+WEIGHTS_NAME = "model.safetensors"
+INT8_WEIGHTS_NAME = "model-int8.pt"
+ONNX_DIR = "onnx"
+MANIFEST_NAME = "manifest.json"
+## Never reach the hub: a missing snapshot is an error, not a download
+OFFLINE = os.environ.get("CRISPY_OFFLINE", "0") != "0"
+## The Rust tokenizer encodes and decodes batches in parallel
+FAST_TOKENIZER = os.environ.get("CRISPY_FAST_TOKENIZER", "1") != "0"
+
+DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+_lock = threading.RLock()
+_models = {}
+_tokenizers = {}
+## Per-thread copies of the tokenizers
+_local = threading.local()
+
+
+def snapshot_dir(name: str) -> str:
+    return os.path.join(CACHE_DIR, re.sub(r"[^\w.-]+", "--", name))
+
+
+def read_manifest(name: str) -> dict:
+    """What the registry holds for ``name``: variants, library versions."""
+    try:
+        with open(os.path.join(snapshot_dir(name), MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"name": name, "variants": {}}
+
+
+def library_versions() -> dict:
+    return {"torch": torch.__version__, "transformers": transformers.__version__}
+
+
+def write_manifest(name: str, variant: str, path: str):
+    """Records a variant's file or directory, relative to the snapshot."""
+    manifest = read_manifest(name)
+    manifest["variants"][variant] = {
+        "path": path,
+        "versions": library_versions(),
+        "created": time.time(),
+    }
+
+    path = os.path.join(snapshot_dir(name), MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def ensure_snapshot(name: str) -> str:
+    """
+    Returns a local directory holding the config, tokenizer and safetensors
+    weights of the model. The first call on a host converts the hub
+    checkpoint; every later process on the host reuses the files. With
+    CRISPY_OFFLINE set, a missing snapshot raises instead.
+    """
+    directory = snapshot_dir(name)
+    if os.path.exists(os.path.join(directory, WEIGHTS_NAME)):
+        return directory
+    if OFFLINE:
+        raise FileNotFoundError(
+            f"No snapshot of {name} in {directory} and CRISPY_OFFLINE is set; "
+            "build one with tools/prepare_models.py"
+        )
+
+    logger.info("Converting %s to a safetensors snapshot in %s", name, directory)
+    os.makedirs(directory, exist_ok=True)
+    model = BartForConditionalGeneration.from_pretrained(name)
+    ## Saves both the slow files and tokenizer.json for the fast tokenizer
+    BartTokenizerFast.from_pretrained(name).save_pretrained(directory)
+    model.config.save_pretrained(directory)
+    model.generation_config.save_pretrained(directory)
+
+    ## safetensors refuses aliased tensors; tied weights are re-tied on load
+    seen, state_dict = set(), {}
+    for key, tensor in model.state_dict().items():
+        if tensor.data_ptr() not in seen:
+            seen.add(tensor.data_ptr())
+            state_dict[key] = tensor.contiguous()
+
+    path = os.path.join(directory, WEIGHTS_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    save_file(state_dict, tmp_path)
+    ## Written last and atomically: its presence marks a complete snapshot
+    os.replace(tmp_path, path)
+    write_manifest(name, "fp32", WEIGHTS_NAME)
+    return directory
+
+
+def mmap_safetensors(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Maps a safetensors file and returns tensors that point into the mapping.
+    The mapping is private (copy-on-write) and never written to, so every
+    process on the host reads the same page cache pages.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    (header_size,) = struct.unpack("<Q", buffer[:8])
+    header = json.loads(buffer[8 : 8 + header_size])
+    header.pop("__metadata__", None)
+
+    tensors = {}
+    for key, info in header.items():
+        dtype = DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        count = (end - start) // torch.tensor([], dtype=dtype).element_size()
+        tensor = torch.frombuffer(
+            buffer, dtype=dtype, count=count, offset=8 + header_size + start
+        )
+        tensors[key] = tensor.view(info["shape"])
+    return tensors
+
+
+def _assign(model: torch.nn.Module, key: str, tensor: torch.Tensor, aliases: dict):
+    module_name, _, attr = key.rpartition(".")
+    module = model.get_submodule(module_name)
+    if attr not in module._parameters:
+        module._buffers[attr] = tensor
+        return
+    ## Tied weights (shared embeddings, lm_head) get the same new Parameter
+    param = torch.nn.Parameter(tensor, requires_grad=False)
+    owners = aliases.get(id(module._parameters[attr]), [(module, attr)])
+    for owner, owner_attr in owners:
+        owner._parameters[owner_attr] = param
+
+
+def _load_model(name: str) -> BartForConditionalGeneration:
+    directory = ensure_snapshot(name)
+    config = BartConfig.from_pretrained(directory, local_files_only=True)
+    config._name_or_path = name
+
+    ## Build on the meta device so no weights are allocated or initialized
+    with torch.device("meta"):
+        model = BartForConditionalGeneration(config)
+
+    aliases = {}
+    for module in model.modules():
+        for attr, param in module._parameters.items():
+            if param is not None:
+                aliases.setdefault(id(param), []).append((module, attr))
+
+    own_keys = set(model.state_dict())
+    for key, tensor in mmap_safetensors(os.path.join(directory, WEIGHTS_NAME)).items():
+        if key not in own_keys and "model." + key in own_keys:
+            key = "model." + key
+        _assign(model, key, tensor, aliases)
+
+    missing = [
+        key
+        for key, tensor in list(model.named_parameters()) + list(model.named_buffers())
+        if tensor.is_meta
+    ]
+    if missing:
+        raise ValueError(f"Snapshot {directory} is missing weights: {missing}")
+
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(
+            directory, local_files_only=True
+        )
+    except OSError:
+        pass
+    return model.eval()
+
+
+def tokenizer_version(tokenizer, max_length: int) -> Optional[str]:
+    """
+    Fingerprint of everything that decides the input ids: vocabulary, merges,
+    pre- and post-processing and the truncation length. Pre-tokenized
+    articles are only trusted when they carry the same tag. The listener
+    computes it the same way. Slow tokenizers have no serialized state, so
+    they get no tag and always tokenize themselves.
+    """
+    if not tokenizer.is_fast:
+        return None
+    state = json.loads(tokenizer.backend_tokenizer.to_str())
+    parts = {
+        key: state.get(key)
+        for key in ("normalizer", "pre_tokenizer", "model", "post_processor")
+    }
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8"))
+    return f"{digest.hexdigest()[:16]}:{max_length}"
+
+
+def _load_int8(name: str) -> BartForConditionalGeneration:
+    variant = read_manifest(name)["variants"].get("int8")
+    ## The pickled modules only load into the library versions that saved them
+    if variant and variant["versions"] == library_versions():
+        path = os.path.join(snapshot_dir(name), variant["path"])
+        return torch.load(path, weights_only=False).eval()
+    logger.info("No prequantized int8 variant of %s, quantizing", name)
+    return quantize_int8(load_model(name))
+
+
+def save_int8(name: str):
+    """Stores the int8 dynamically quantized model as a registry variant."""
+    path = os.path.join(ensure_snapshot(name), INT8_WEIGHTS_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(quantize_int8(load_model(name)), tmp_path)
+    os.replace(tmp_path, path)
+    write_manifest(name, "int8", INT8_WEIGHTS_NAME)
+
+
+def load_model(
+    name: str = MODEL_NAME, variant: str = "fp32"
+) -> BartForConditionalGeneration:
+    """
+    The process-wide model for ``name``, loaded on first use. The "int8"
+    variant comes prequantized from the registry when it has one.
+    """
+    with _lock:
+        if (name, variant) not in _models:
+            loader = _load_int8 if variant == "int8" else _load_model
+            _models[name, variant] = loader(name)
+        return _models[name, variant]
+
+
+def load_tokenizer(name: str = MODEL_NAME, fast: bool = FAST_TOKENIZER):
+    """
+    This thread's tokenizer for ``name``, loaded once and copied per thread.
+    A fast tokenizer changes its Rust state whenever a call uses other
+    truncation or padding settings, and concurrent calls on one instance
+    fail with "Already borrowed".
+    """
+    tokenizers = _local.__dict__.setdefault("tokenizers", {})
+    if (name, fast) not in tokenizers:
+        tokenizer_class = BartTokenizerFast if fast else BartTokenizer
+        with _lock:
+            if (name, fast) not in _tokenizers:
+                _tokenizers[name, fast] = tokenizer_class.from_pretrained(
+                    ensure_snapshot(name), local_files_only=True
+                )
+            tokenizers[name, fast] = copy.deepcopy(_tokenizers[name, fast])
+    return tokenizers[name, fast]
@@ -0,0 +1,242 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+## "tokenize" covers detokenizing the summaries too, "decode" is generation
+## minus the encoder pass
+STAGES = ("parse", "tokenize", "encoder", "decode", "serialize")
+COUNTERS = ("tokens_in", "tokens_out", "beam_steps", "padded_tokens")
+## Counters per model id, from the router's tiers
+MODEL_COUNTERS = {
+    "articles": "Articles summarized per model.",
+    "tokens": "Input tokens summarized per model.",
+    "seconds": "Seconds spent summarizing per model.",
+}
+
+## Upper bounds in seconds, shared by every stage histogram
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current = contextvars.ContextVar("crispy_profile", default=None)
+
+
+class Profile:
+    """
+    Stage timings and counters of one unit of work: a request, or a batch
+    shared by several requests. Recording is a perf_counter call and a
+    dict update, cheap enough to leave on.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        ## Micro-batch profiles this request's articles ran in; reported in
+        ## its headers but observed into the registry by the scheduler
+        self.batches: List["Profile"] = []
+        self._lock = threading.Lock()
+
+    def add_time(self, stage: str, seconds: float):
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def count(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                self.counters[name] += value
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def merge(self, other: "Profile"):
+        for stage, seconds in other.seconds.items():
+            self.add_time(stage, seconds)
+        self.count(**other.counters)
+
+    def attach(self, batch: "Profile"):
+        with self._lock:
+            if not any(batch is seen for seen in self.batches):
+                self.batches.append(batch)
+
+    def total(self) -> "Profile":
+        """This profile with its attached batch profiles merged in."""
+        total = Profile()
+        for profile in (self, *self.batches):
+            total.merge(profile)
+        return total
+
+    def to_dict(self) -> dict:
+        """Plain data, for sending across processes."""
+        return {"seconds": dict(self.seconds), "counters": dict(self.counters)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Profile":
+        profile = cls()
+        profile.seconds.update(data["seconds"])
+        profile.counters.update(data["counters"])
+        return profile
+
+    @property
+    def padding_ratio(self) -> float:
+        """Share of the padded input tokens that were padding."""
+        padded = self.counters["padded_tokens"]
+        return 1 - self.counters["tokens_in"] / padded if padded else 0.0
+
+    def headers(self) -> Dict[str, str]:
+        """Per-request response headers, batch profiles included."""
+        total = self.total()
+        headers = {
+            f"X-Crispy-{stage.capitalize()}-Ms": f"{total.seconds[stage] * 1000:.1f}"
+            for stage in STAGES
+            if stage in total.seconds
+        }
+        for name in ("tokens_in", "tokens_out", "beam_steps"):
+            header = "X-Crispy-" + name.replace("_", "-").title()
+            headers[header] = str(total.counters[name])
+        headers["X-Crispy-Padding-Ratio"] = f"{total.padding_ratio:.3f}"
+        return headers
+
+
+def current_profile() -> Optional[Profile]:
+    """The profile that work on this thread records into, if any."""
+    return _current.get()
+
+
+@contextmanager
+def profiling(profile: Profile):
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Times a stage into the current profile; a no-op without one."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    with profile.stage(name):
+        yield
+
+
+@contextmanager
+def ensure_profile():
+    """
+    Yields the active profile, or profiles the block into a new one that is
+    observed into REGISTRY when it ends.
+    """
+    profile = _current.get()
+    if profile is not None:
+        yield profile
+        return
+    profile = Profile()
+    with profiling(profile):
+        yield profile
+    REGISTRY.observe(profile)
+
+
+def time_module(module, name: str):
+    """Times every forward pass of a torch module as stage ``name``."""
+    if getattr(module, "_crispy_timed", False):
+        ## Shared models are hooked once, or passes would count twice
+        return
+    starts = threading.local()
+
+    def before(module, args):
+        starts.value = time.perf_counter()
+
+    def after(module, args, output):
+        profile = _current.get()
+        if profile is not None:
+            profile.add_time(name, time.perf_counter() - starts.value)
+
+    module.register_forward_pre_hook(before)
+    module.register_forward_hook(after)
+    module._crispy_timed = True
+
+
+class MetricsRegistry:
+    """
+    Process-wide totals in the Prometheus text format: a latency histogram
+    per stage, a counter per profile counter, counters per model id and
+    any gauges that were set.
+    """
+
+    def __init__(self, buckets: Iterable[float] = BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms = {
+            stage: [[0] * (len(self.buckets) + 1), 0.0] for stage in STAGES
+        }
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._models = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, profile: Profile):
+        with self._lock:
+            for stage, seconds in profile.seconds.items():
+                counts, _ = histogram = self._histograms[stage]
+                counts[bisect.bisect_left(self.buckets, seconds)] += 1
+                histogram[1] += seconds
+            for name, value in profile.counters.items():
+                self._counters[name] += value
+
+    def add_model(self, model_name: str, articles: int, tokens: int, seconds: float):
+        """Adds to the MODEL_COUNTERS of one model id."""
+        with self._lock:
+            totals = self._models.setdefault(model_name, [0, 0, 0.0])
+            totals[0] += articles
+            totals[1] += tokens
+            totals[2] += seconds
+
+    def set_gauge(self, name: str, value: float, description: str):
+        """Exported as crispy_<name> until set again."""
+        with self._lock:
+            self._gauges[name] = (value, description)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP crispy_stage_seconds Time spent per summarization stage.",
+                "# TYPE crispy_stage_seconds histogram",
+            ]
+            for stage, (counts, total) in self._histograms.items():
+                label = f'stage="{stage}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(
+                        f'crispy_stage_seconds_bucket{{{label},le="{bound}"}} '
+                        f"{cumulative}"
+                    )
+                lines.append(f"crispy_stage_seconds_sum{{{label}}} {total}")
+                lines.append(f"crispy_stage_seconds_count{{{label}}} {cumulative}")
+            for name, value in self._counters.items():
+                lines.append(f"# TYPE crispy_{name}_total counter")
+                lines.append(f"crispy_{name}_total {value}")
+            model_counters = enumerate(MODEL_COUNTERS.items()) if self._models else ()
+            for column, (name, description) in model_counters:
+                lines.append(f"# HELP crispy_model_{name}_total {description}")
+                lines.append(f"# TYPE crispy_model_{name}_total counter")
+                for model_name, totals in self._models.items():
+                    lines.append(
+                        f'crispy_model_{name}_total{{model="{model_name}"}} '
+                        f"{totals[column]}"
+                    )
+            for name, (value, description) in self._gauges.items():
+                lines.append(f"# HELP crispy_{name} {description}")
+                lines.append(f"# TYPE crispy_{name} gauge")
+                lines.append(f"crispy_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,381 @@
+import inspect
+import logging
+import os
+import re
+
+import numpy as np
+import onnxruntime as ort
+import torch
+
+from .backends import SummarizerBackend
+from .loader import ONNX_DIR, snapshot_dir, write_manifest
+from .metrics import stage
+
+logger = logging.getLogger(__name__)
+
+## By default the graphs are a variant in the model's registry snapshot
+CACHE_DIR = os.environ.get("CRISPY_ONNX_CACHE")
+OPSET = 14
+
+
+class _Encoder(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.encoder = model.get_encoder()
+
+    def forward(self, input_ids, attention_mask):
+        return self.encoder(
+            input_ids=input_ids, attention_mask=attention_mask, return_dict=True
+        ).last_hidden_state
+
+
+class _Decoder(torch.nn.Module):
+    """
+    One decoding step. Without past it returns the logits and the full
+    present (self and cross attention key/values per layer); with past it
+    takes the flattened past and returns only the new self attention
+    key/values, since the cross attention ones never change.
+    """
+
+    def __init__(self, model, with_past: bool):
+        super().__init__()
+        self.decoder = model.get_decoder()
+        self.lm_head = model.lm_head
+        self.register_buffer("final_logits_bias", model.final_logits_bias)
+        self.with_past = with_past
+
+    def forward(self, input_ids, encoder_hidden_states, encoder_attention_mask, *past):
+        past_key_values = None
+        if self.with_past:
+            past_key_values = tuple(
+                tuple(past[i : i + 4]) for i in range(0, len(past), 4)
+            )
+        outputs = self.decoder(
+            input_ids=input_ids,
+            encoder_hidden_states=encoder_hidden_states,
+            encoder_attention_mask=encoder_attention_mask,
+            past_key_values=past_key_values,
+            use_cache=True,
+            return_dict=True,
+        )
+        logits = self.lm_head(outputs.last_hidden_state[:, -1]) + self.final_logits_bias
+        present = []
+        for layer in outputs.past_key_values:
+            present.extend(layer[:2] if self.with_past else layer)
+        return (logits, *present)
+
+
+def _past_names(num_layers: int, prefix: str, cross: bool = True):
+    kinds = ("self_key", "self_value", "cross_key", "cross_value")
+    if not cross:
+        kinds = kinds[:2]
+    return [f"{prefix}.{layer}.{kind}" for layer in range(num_layers) for kind in kinds]
+
+
+def export_model(model, directory: str):
+    """Exports the encoder, first decoder step and decoder-with-past graphs."""
+    os.makedirs(directory, exist_ok=True)
+    num_layers = model.config.decoder_layers
+    input_ids = torch.ones((2, 8), dtype=torch.long)
+    attention_mask = torch.ones((2, 8), dtype=torch.long)
+    decoder_ids = torch.full((2, 1), model.config.decoder_start_token_id)
+    ## The graphs are written for the TorchScript exporter (dynamic_axes),
+    ## which newer torch releases only use when asked to
+    options = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        options["dynamo"] = False
+
+    def export(module, args, name, input_names, output_names, dynamic_axes):
+        path = os.path.join(directory, name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                module,
+                args,
+                tmp_path,
+                input_names=input_names,
+                output_names=output_names,
+                dynamic_axes=dynamic_axes,
+                opset_version=OPSET,
+                **options,
+            )
+        ## Atomic, so concurrent workers never load a half written graph
+        os.replace(tmp_path, path)
+
+    batch_axes = {0: "batch", 1: "encoder_sequence"}
+    encoder = _Encoder(model).eval()
+    export(
+        encoder,
+        (input_ids, attention_mask),
+        "encoder.onnx",
+        ["input_ids", "attention_mask"],
+        ["encoder_hidden_states"],
+        {
+            "input_ids": batch_axes,
+            "attention_mask": batch_axes,
+            "encoder_hidden_states": batch_axes,
+        },
+    )
+    with torch.no_grad():
+        hidden = encoder(input_ids, attention_mask)
+
+    decoder = _Decoder(model, with_past=False).eval()
+    present_names = _past_names(num_layers, "present")
+    past_axes = {0: "batch", 2: "past_sequence"}
+    cross_axes = {0: "batch", 2: "encoder_sequence"}
+    present_axes = {
+        name: (cross_axes if "cross" in name else past_axes) for name in present_names
+    }
+    common_axes = {
+        "input_ids": {0: "batch"},
+        "encoder_hidden_states": batch_axes,
+        "encoder_attention_mask": batch_axes,
+        "logits": {0: "batch"},
+    }
+    export(
+        decoder,
+        (decoder_ids, hidden, attention_mask),
+        "decoder.onnx",
+        ["input_ids", "encoder_hidden_states", "encoder_attention_mask"],
+        ["logits", *present_names],
+        {**common_axes, **present_axes},
+    )
+    with torch.no_grad():
+        present = decoder(decoder_ids, hidden, attention_mask)[1:]
+
+    past_names = _past_names(num_layers, "past")
+    new_names = _past_names(num_layers, "present", cross=False)
+    export(
+        _Decoder(model, with_past=True).eval(),
+        (decoder_ids, hidden, attention_mask, *present),
+        "decoder_with_past.onnx",
+        ["input_ids", "encoder_hidden_states", "encoder_attention_mask", *past_names],
+        ["logits", *new_names],
+        {
+            **common_axes,
+            **{
+                name: (cross_axes if "cross" in name else past_axes)
+                for name in past_names
+            },
+            **{name: past_axes for name in new_names},
+        },
+    )
+
+
+def onnx_dir(name: str) -> str:
+    if CACHE_DIR is None:
+        return os.path.join(snapshot_dir(name), ONNX_DIR)
+    return os.path.join(CACHE_DIR, re.sub(r"[^\w.-]+", "--", name))
+
+
+class _BeamHypotheses:
+    """The best finished hypotheses of one article."""
+
+    def __init__(self, num_beams: int, length_penalty: float, early_stopping: bool):
+        self.num_beams = num_beams
+        self.length_penalty = length_penalty
+        self.early_stopping = early_stopping
+        self.beams = []
+
+    def add(self, tokens, sum_logprobs: float):
+        score = sum_logprobs / (len(tokens) ** self.length_penalty)
+        self.beams.append((score, tokens))
+        self.beams.sort(key=lambda beam: beam[0], reverse=True)
+        del self.beams[self.num_beams :]
+
+    def is_done(self, best_sum_logprobs: float, cur_len: int) -> bool:
+        if len(self.beams) < self.num_beams:
+            return False
+        if self.early_stopping:
+            return True
+        worst = self.beams[-1][0]
+        return worst >= best_sum_logprobs / (cur_len**self.length_penalty)
+
+
+class OnnxBackend(SummarizerBackend):
+    """
+    ONNX Runtime backend. The encoder and decoder graphs are exported once
+    per model into CRISPY_ONNX_CACHE and reused by every later process.
+    Generation is a beam search that feeds only the newest token to the
+    decoder-with-past graph and carries the key/value cache between steps.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model, precision: str = "fp32"):
+        if precision != "fp32":
+            logger.warning("ONNX backend only supports fp32, ignoring %s", precision)
+        super().__init__(model, "fp32")
+
+        self.config = getattr(model, "generation_config", model.config)
+        self.num_layers = model.config.decoder_layers
+        self.directory = onnx_dir(model.config._name_or_path)
+        if not os.path.exists(os.path.join(self.directory, "decoder_with_past.onnx")):
+            logger.info("Exporting ONNX graphs to %s", self.directory)
+            export_model(model, self.directory)
+            if CACHE_DIR is None:
+                write_manifest(model.config._name_or_path, "onnx", ONNX_DIR)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.encoder, self.decoder, self.decoder_with_past = (
+            ort.InferenceSession(
+                os.path.join(self.directory, name),
+                options,
+                providers=["CPUExecutionProvider"],
+            )
+            for name in ("encoder.onnx", "decoder.onnx", "decoder_with_past.onnx")
+        )
+        self._past_inputs = [i.name for i in self.decoder_with_past.get_inputs()]
+
+    def _process_logits(self, logprobs, sequences, cur_len, max_length, min_length):
+        config = self.config
+        if cur_len < min_length:
+            logprobs[:, config.eos_token_id] = -np.inf
+        ## As in transformers, a forced token scores 0, not its log-probability
+        if cur_len == 1 and config.forced_bos_token_id is not None:
+            logprobs[:] = -np.inf
+            logprobs[:, config.forced_bos_token_id] = 0
+        if cur_len == max_length - 1 and config.forced_eos_token_id is not None:
+            logprobs[:] = -np.inf
+            logprobs[:, config.forced_eos_token_id] = 0
+
+        n = config.no_repeat_ngram_size or 0
+        if n and cur_len + 1 >= n:
+            for row, tokens in enumerate(sequences):
+                prefix = tuple(tokens[cur_len - n + 1 :])
+                for i in range(cur_len - n + 1):
+                    if tuple(tokens[i : i + n - 1]) == prefix:
+                        logprobs[row, tokens[i + n - 1]] = -np.inf
+        return logprobs
+
+    def generate(
+        self,
+        input_ids,
+        attention_mask,
+        max_length=120,
+        min_length=40,
+        num_beams=None,
+        early_stopping=None,
+        on_step=None,
+    ):
+        config = self.config
+        num_beams = num_beams or config.num_beams or 1
+        if early_stopping is None:
+            early_stopping = config.early_stopping
+        input_ids = np.asarray(input_ids, dtype=np.int64)
+        attention_mask = np.asarray(attention_mask, dtype=np.int64)
+        batch_size = input_ids.shape[0]
+
+        with stage("encoder"):
+            hidden = self.encoder.run(
+                None, {"input_ids": input_ids, "attention_mask": attention_mask}
+            )[0]
+        hidden = np.repeat(hidden, num_beams, axis=0)
+        attention_mask = np.repeat(attention_mask, num_beams, axis=0)
+
+        sequences = np.full(
+            (batch_size * num_beams, 1), config.decoder_start_token_id, dtype=np.int64
+        )
+        beam_scores = np.zeros((batch_size, num_beams), dtype=np.float32)
+        beam_scores[:, 1:] = -1e9
+        beam_scores = beam_scores.reshape(-1)
+
+        hypotheses = [
+            _BeamHypotheses(num_beams, config.length_penalty, early_stopping)
+            for _ in range(batch_size)
+        ]
+        done = [False] * batch_size
+        past = None
+
+        for cur_len in range(1, max_length):
+            feed = {
+                "input_ids": sequences[:, -1:],
+                "encoder_hidden_states": hidden,
+                "encoder_attention_mask": attention_mask,
+            }
+            if past is None:
+                logits, *present = self.decoder.run(None, feed)
+                cross = [present[i + 2 : i + 4] for i in range(0, len(present), 4)]
+                past = [present[i : i + 2] for i in range(0, len(present), 4)]
+            else:
+                for layer in range(self.num_layers):
+                    for kind, value in zip(
+                        ("self_key", "self_value", "cross_key", "cross_value"),
+                        (*past[layer], *cross[layer]),
+                    ):
+                        feed[f"past.{layer}.{kind}"] = value
+                ## The exporter drops encoder_hidden_states from this graph
+                ## when only its shape was used, so feed just what it takes
+                logits, *present = self.decoder_with_past.run(
+                    None, {name: feed[name] for name in self._past_inputs}
+                )
+                past = [present[i : i + 2] for i in range(0, len(present), 2)]
+
+            logits = logits - logits.max(axis=-1, keepdims=True)
+            logprobs = logits - np.log(np.exp(logits).sum(axis=-1, keepdims=True))
+            logprobs = self._process_logits(
+                logprobs, sequences, cur_len, max_length, min_length
+            )
+            vocab_size = logprobs.shape[-1]
+            scores = (logprobs + beam_scores[:, None]).reshape(batch_size, -1)
+
+            top = np.argsort(-scores, axis=-1)[:, : 2 * num_beams]
+            next_scores = np.zeros(batch_size * num_beams, dtype=np.float32)
+            next_tokens = np.full(batch_size * num_beams, config.pad_token_id)
+            next_rows = np.zeros(batch_size * num_beams, dtype=np.int64)
+
+            for batch in range(batch_size):
+                offset = batch * num_beams
+                if done[batch]:
+                    next_rows[offset : offset + num_beams] = offset
+                    continue
+                slot = 0
+                for rank, candidate in enumerate(top[batch]):
+                    row = offset + candidate // vocab_size
+                    token = candidate % vocab_size
+                    score = scores[batch, candidate]
+                    if token == config.eos_token_id:
+                        if rank < num_beams:
+                            hypotheses[batch].add(sequences[row].tolist(), score)
+                        continue
+                    next_scores[offset + slot] = score
+                    next_tokens[offset + slot] = token
+                    next_rows[offset + slot] = row
+                    slot += 1
+                    if slot == num_beams:
+                        break
+                ## The best candidate, even if it ended, as transformers does
+                done[batch] = hypotheses[batch].is_done(
+                    scores[batch, top[batch][0]], cur_len
+                )
+
+            if all(done):
+                break
+
+            beam_scores = next_scores
+            sequences = np.concatenate(
+                [sequences[next_rows], next_tokens[:, None]], axis=-1
+            )
+            past = [[kv[next_rows] for kv in layer] for layer in past]
+            if on_step is not None and num_beams == 1:
+                for row, ids in enumerate(sequences.tolist()):
+                    on_step(row, ids)
+        else:
+            for batch in range(batch_size):
+                if done[batch]:
+                    continue
+                for row in range(batch * num_beams, (batch + 1) * num_beams):
+                    hypotheses[batch].add(sequences[row].tolist(), beam_scores[row])
+
+        best = [
+            max(hyp.beams, key=lambda beam: beam[0])[1] + [config.eos_token_id]
+            for hyp in hypotheses
+        ]
+        output = np.full(
+            (batch_size, max(len(tokens) for tokens in best)), config.pad_token_id
+        )
+        for row, tokens in enumerate(best):
+            output[row, : len(tokens)] = tokens
+        return torch.from_numpy(output)
@@ -0,0 +1,282 @@
+import atexit
+import functools
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future, as_completed
+from typing import List
+
+import torch
+
+from .batcher import PeakRSSSampler
+from .metrics import Profile, current_profile, profiling
+from .summarizer import CrispySummarizer
+
+## Replica processes are named after this prefix; the package checks it on
+## import so replicas do not build the serving process's objects
+REPLICA_NAME = "crispy-replica"
+
+
+def partition_cores(replicas: int) -> List[List[int]]:
+    """Splits the cores this process may run on into disjoint, even sets."""
+    cores = sorted(os.sched_getaffinity(0))
+    if replicas > len(cores):
+        raise ValueError(f"Cannot pin {replicas} replicas to {len(cores)} cores")
+    size, extra = divmod(len(cores), replicas)
+    partitions, start = [], 0
+    for index in range(replicas):
+        end = start + size + (index < extra)
+        partitions.append(cores[start:end])
+        start = end
+    return partitions
+
+
+def _replica_main(index, cores, model_name, precision, backend, tasks, results):
+    os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+    torch.set_num_interop_threads(1)
+
+    summarizer = CrispySummarizer(
+        precision=precision, backend=backend, model_name=model_name
+    )
+    ## Loads the weights before the first batch's memory is sampled
+    summarizer.warm_up()
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, input_ids, kwargs = task
+        try:
+            with PeakRSSSampler() as sampler, profiling(Profile()) as profile:
+                summaries = summarizer.generate(input_ids, **kwargs)
+            peak_bytes = sampler.peak - sampler.baseline
+            stages = profile.to_dict()
+            results.put((task_id, index, summaries, peak_bytes, stages, None))
+        except Exception:
+            results.put((task_id, index, None, 0, None, traceback.format_exc()))
+
+
+class SummarizerPool(CrispySummarizer):
+    """
+    Runs K model replicas in worker processes, each pinned to a disjoint set
+    of cores with torch intra-op threads matching its core count and a
+    single inter-op thread, so replicas never compete for the same cores.
+
+    Tokenization and caching stay in this process; each padded batch is
+    sent to the replica with the fewest padded tokens in flight. Replicas
+    profile their batches and send the stages back with the summaries.
+    Buckets are streamed to on_done as they finish; token streaming
+    (on_partial) would cross the process boundary and is not supported.
+
+    A replica that dies fails the batches it had in flight and is replaced.
+    """
+
+    ## Seconds between checks that every replica process is still alive
+    watchdog_interval = float(os.environ.get("CRISPY_POOL_WATCHDOG_S", 5))
+
+    def __init__(
+        self,
+        replicas: int,
+        precision=None,
+        backend=None,
+        cache=None,
+        model_name=None,
+        near_duplicates=None,
+    ):
+        super().__init__(
+            precision=precision,
+            backend=backend,
+            cache=cache,
+            model_name=model_name,
+            near_duplicates=near_duplicates,
+        )
+        self.replicas = replicas
+
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._cores = partition_cores(replicas)
+        self._tasks = [None] * replicas
+        self._processes = [None] * replicas
+        self._closing = False
+        for index in range(replicas):
+            self._start(index)
+
+        self._load = [0] * replicas
+        self._futures = {}
+        self._ids = itertools.count()
+        self._dispatch_lock = threading.Lock()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+
+    def _start(self, index: int):
+        tasks = self._context.Queue()
+        process = self._context.Process(
+            target=_replica_main,
+            name=f"{REPLICA_NAME}-{index}",
+            args=(
+                index,
+                self._cores[index],
+                self.model_name,
+                self.precision,
+                self.backend_name,
+                tasks,
+                self._results,
+            ),
+            daemon=True,
+        )
+        process.start()
+        self._tasks[index] = tasks
+        self._processes[index] = process
+
+    def _check_replicas(self):
+        """Fails the batches of every dead replica and starts a replacement."""
+        with self._dispatch_lock:
+            for index, process in enumerate(self._processes):
+                if self._closing or process.is_alive():
+                    continue
+                error = RuntimeError(
+                    f"Replica {index} exited with code {process.exitcode}"
+                )
+                lost = [
+                    task_id
+                    for task_id, entry in self._futures.items()
+                    if entry[0] == index
+                ]
+                for task_id in lost:
+                    self._futures.pop(task_id)[1].set_exception(error)
+                self._load[index] = 0
+                self._start(index)
+
+    def _collect(self):
+        checked = time.monotonic()
+        while True:
+            try:
+                message = self._results.get(timeout=self.watchdog_interval)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                break
+            ## A replica that crashed or was killed never answers
+            if time.monotonic() - checked >= self.watchdog_interval:
+                self._check_replicas()
+                checked = time.monotonic()
+            if not message:
+                continue
+            task_id, index, summaries, peak_bytes, stages, error = message
+            with self._dispatch_lock:
+                entry = self._futures.pop(task_id, None)
+                if entry is None:
+                    ## Already failed by the watchdog
+                    continue
+                _, future, padded_tokens, batcher, profile = entry
+                self._load[index] -= padded_tokens
+            if error is not None:
+                future.set_exception(RuntimeError(f"Replica {index} failed:\n{error}"))
+                continue
+            if batcher is not None:
+                batcher.observe(padded_tokens, peak_bytes)
+            if profile is not None:
+                ## Before the result, so the batch is complete when observed
+                profile.merge(Profile.from_dict(stages))
+            future.set_result(summaries)
+
+    def submit(self, input_ids: List[List[int]], batcher=None, **kwargs) -> Future:
+        """Queues one batch on the least loaded replica."""
+        future = Future()
+        padded_tokens = len(input_ids) * max(len(ids) for ids in input_ids)
+        with self._dispatch_lock:
+            index = min(range(self.replicas), key=self._load.__getitem__)
+            task_id = next(self._ids)
+            self._load[index] += padded_tokens
+            profile = current_profile()
+            self._futures[task_id] = (index, future, padded_tokens, batcher, profile)
+            ## Under the lock, so a replacement replica cannot miss the task
+            self._tasks[index].put((task_id, input_ids, kwargs))
+        return future
+
+    def generate(self, input_ids: List[List[int]], **kwargs) -> List[str]:
+        return self.submit(input_ids, **kwargs).result()
+
+    def warm_up(self):
+        """Warms up every replica, not just whichever is least loaded."""
+        ids = self.encode(["warm up"])
+        futures = []
+        for index in range(self.replicas):
+            future = Future()
+            with self._dispatch_lock:
+                task_id = next(self._ids)
+                self._futures[task_id] = (index, future, 0, None, None)
+                self._tasks[index].put(
+                    (task_id, ids, {"max_length": 8, "min_length": 1})
+                )
+            futures.append(future)
+        for future in futures:
+            future.result()
+
+    def _generate_buckets(
+        self,
+        input_ids: List[List[int]],
+        bucket_size=None,
+        batcher=None,
+        preset=None,
+        latency_budget_ms=None,
+        on_done=None,
+        on_partial=None,
+        cut=None,
+        **settings,
+    ) -> List[str]:
+        ## Same bucketing as the single process path, but every bucket is
+        ## submitted before waiting so the replicas run them concurrently,
+        ## and each one gets the whole latency budget
+        lengths = [len(ids) for ids in input_ids]
+        buckets = list(self._buckets(lengths, bucket_size, batcher))
+
+        futures = {}
+        for bucket in buckets:
+            kwargs = self._bucket_settings(
+                lengths, bucket, preset, latency_budget_ms, cut, settings
+            )
+            future = self.submit(
+                [input_ids[i] for i in bucket], batcher=batcher, **kwargs
+            )
+            future.add_done_callback(
+                functools.partial(
+                    self._observe,
+                    len(bucket) * kwargs["num_beams"],
+                    kwargs["max_new_tokens"],
+                    time.perf_counter(),
+                )
+            )
+            futures[future] = bucket
+        summaries = [None] * len(input_ids)
+        for future in as_completed(futures):
+            bucket, outputs = futures[future], future.result()
+            for i, summary in zip(bucket, outputs):
+                summaries[i] = summary
+            if on_done is not None:
+                on_done(bucket, outputs)
+        return summaries
+
+    def _observe(self, sequences, max_new_tokens, submitted, future):
+        ## Includes the time queued behind other batches on the replica
+        if future.exception() is None:
+            self.policy.observe(
+                sequences, max_new_tokens, time.perf_counter() - submitted
+            )
+
+    def close(self):
+        if not self._processes:
+            return
+        with self._dispatch_lock:
+            self._closing = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=30)
+        self._results.put(None)
+        self._processes = []
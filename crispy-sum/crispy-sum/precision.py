@@ -0,0 +1,52 @@
+import contextlib
+import logging
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+
+def cpu_supports_bf16() -> bool:
+    """True if the CPU has native bf16 instructions (AVX512-BF16 or AMX)."""
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            flags = cpuinfo.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def resolve_precision(precision: str) -> str:
+    """
+    Validates the requested precision. bf16 without hardware support is
+    slower than fp32 on CPU, so it falls back to fp32 with a warning.
+    """
+    precision = precision.lower()
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unknown precision {precision!r}, expected one of {PRECISIONS}"
+        )
+    if precision == "bf16" and not cpu_supports_bf16():
+        logger.warning("CPU has no native bf16 support, falling back to fp32")
+        return "fp32"
+    return precision
+
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """Returns a copy of the model with int8 dynamically quantized Linear layers."""
+    quantized = torch.ao.nn.quantized.dynamic.Linear
+    if any(isinstance(module, quantized) for module in model.modules()):
+        ## Already quantized, e.g. the int8 variant from the model registry
+        return model
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def autocast(precision: str):
+    """Autocast context for the given precision, a no-op unless bf16."""
+    if precision == "bf16":
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return contextlib.nullcontext()
@@ -0,0 +1,58 @@
+import json
+import logging
+import os
+from typing import Iterable, List
+
+from .loader import (
+    CACHE_DIR,
+    MANIFEST_NAME,
+    ONNX_DIR,
+    ensure_snapshot,
+    load_model,
+    read_manifest,
+    save_int8,
+    write_manifest,
+)
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = ("int8", "onnx")
+
+
+def prepare(name: str, variants: Iterable[str] = ()) -> dict:
+    """
+    Builds the registry snapshot of ``name`` (safetensors weights, fast
+    tokenizer, configs) plus the requested variants: "int8" (the
+    dynamically quantized model) and "onnx" (the exported graphs). Meant
+    for build time; at run time, with CRISPY_OFFLINE set, models load from
+    these files only.
+    """
+    variants = list(variants)
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"Unknown variants {sorted(unknown)}, expected {VARIANTS}")
+
+    logger.info("Preparing %s in %s", name, ensure_snapshot(name))
+    if "int8" in variants:
+        save_int8(name)
+    if "onnx" in variants:
+        from .onnx_backend import CACHE_DIR as ONNX_CACHE_DIR
+        from .onnx_backend import export_model, onnx_dir
+
+        export_model(load_model(name), onnx_dir(name))
+        if ONNX_CACHE_DIR is None:
+            write_manifest(name, "onnx", ONNX_DIR)
+    return read_manifest(name)
+
+
+def snapshots() -> List[dict]:
+    """The manifests of every snapshot in the registry."""
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    manifests = []
+    for entry in sorted(os.listdir(CACHE_DIR)):
+        path = os.path.join(CACHE_DIR, entry, MANIFEST_NAME)
+        if os.path.exists(path):
+            with open(path) as f:
+                manifests.append(json.load(f))
+    return manifests
@@ -0,0 +1,193 @@
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List
+
+from .metrics import REGISTRY
+from .summarizer import CrispySummarizer
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRouter:
+    """
+    Sends each article to one of two summarizers: a distilled BART for
+    articles of at most max_tokens tokens, and for every article while
+    backlog_articles or more are still queued behind the batch, and the
+    full model for the long-form rest.
+
+    The tiers are ordinary CrispySummarizer instances (or pools), so each
+    keeps its own generation cost model, and cached summaries are keyed by
+    model id. Throughput is tracked per tier, and exported through REGISTRY
+    labelled by model id.
+    """
+
+    max_tokens = int(os.environ.get("CRISPY_DISTILLED_MAX_TOKENS", 256))
+    backlog_articles = int(os.environ.get("CRISPY_BACKLOG_ARTICLES", 64))
+
+    def __init__(
+        self,
+        full: CrispySummarizer,
+        distilled: CrispySummarizer,
+        max_tokens=None,
+        backlog_articles=None,
+    ):
+        if max_tokens is not None:
+            self.max_tokens = max_tokens
+        if backlog_articles is not None:
+            self.backlog_articles = backlog_articles
+
+        self.full = full
+        self.distilled = distilled
+        ## articles, input tokens and seconds per model id
+        self._stats = {tier.model_name: [0, 0, 0.0] for tier in (full, distilled)}
+        self._lock = threading.Lock()
+
+    @property
+    def tokenizer_version(self):
+        """Pre-tokenized articles are routed with the full tier's tokenizer."""
+        return self.full.tokenizer_version
+
+    def accepts_input_ids(self, input_ids: List[int]) -> bool:
+        return self.full.accepts_input_ids(input_ids)
+
+    def warm_up(self):
+        self.full.warm_up()
+        self.distilled.warm_up()
+
+    def route(self, lengths: List[int], backlog=0) -> List[CrispySummarizer]:
+        """The tier for each article, from its token length and the backlog."""
+        if backlog >= self.backlog_articles:
+            return [self.distilled] * len(lengths)
+        return [
+            self.distilled if length <= self.max_tokens else self.full
+            for length in lengths
+        ]
+
+    def summarize_tagged(
+        self,
+        articles: List[str],
+        backlog=0,
+        input_ids=None,
+        on_done=None,
+        on_partial=None,
+        **kwargs,
+    ) -> List[tuple]:
+        """
+        Summarizes every tier's share of the articles; (summary, model id).
+        ``on_done`` and ``on_partial`` get positions in ``articles``.
+
+        Cached and near-duplicate summaries of either tier are served from
+        the raw text first, full tier first, so hits are never tokenized;
+        only the misses are encoded and routed by length.
+        """
+        results = [None] * len(articles)
+        for tier in (self.full, self.distilled):
+            missing = [i for i, result in enumerate(results) if result is None]
+            if not missing:
+                break
+            found = tier.lookup([articles[i] for i in missing], **kwargs)
+            hits = [
+                (i, summary)
+                for i, summary in zip(missing, found)
+                if summary is not None
+            ]
+            for i, summary in hits:
+                results[i] = (summary, tier.model_name)
+            if hits and on_done is not None:
+                on_done(
+                    [i for i, _ in hits],
+                    [(summary, tier.model_name) for _, summary in hits],
+                )
+
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+        encoded = self.full.encode(
+            [articles[i] for i in misses], input_ids and [input_ids[i] for i in misses]
+        )
+        input_ids = dict(zip(misses, encoded))
+        lengths = [len(ids) for ids in encoded]
+        tiers = dict(zip(misses, self.route(lengths, backlog)))
+
+        for tier in (self.distilled, self.full):
+            indices = [i for i in misses if tiers[i] is tier]
+            if not indices:
+                continue
+            ## Ids only carry over when both tiers tokenize the same way
+            version = tier.tokenizer_version
+            tier_ids = None
+            if version is not None and version == self.full.tokenizer_version:
+                tier_ids = [input_ids[i] for i in indices]
+
+            callbacks = {}
+            if on_done is not None:
+                callbacks["on_done"] = functools.partial(
+                    self._done, on_done, indices, tier.model_name
+                )
+            if on_partial is not None:
+                callbacks["on_partial"] = functools.partial(
+                    self._partial, on_partial, indices
+                )
+
+            start = time.perf_counter()
+            summaries = tier.summarize_bucketed(
+                [articles[i] for i in indices],
+                input_ids=tier_ids,
+                **callbacks,
+                **kwargs,
+            )
+            self._record(
+                tier.model_name,
+                len(indices),
+                sum(len(input_ids[i]) for i in indices),
+                time.perf_counter() - start,
+            )
+            for i, summary in zip(indices, summaries):
+                results[i] = (summary, tier.model_name)
+        return results
+
+    def summarize_bucketed(
+        self, articles: List[str], on_done=None, **kwargs
+    ) -> List[str]:
+        if on_done is not None:
+            kwargs["on_done"] = lambda positions, tagged: on_done(
+                positions, [summary for summary, _ in tagged]
+            )
+        return [summary for summary, _ in self.summarize_tagged(articles, **kwargs)]
+
+    @staticmethod
+    def _done(on_done, indices, model_name, positions, summaries):
+        on_done(
+            [indices[position] for position in positions],
+            [(summary, model_name) for summary in summaries],
+        )
+
+    @staticmethod
+    def _partial(on_partial, indices, position, text):
+        on_partial(indices[position], text)
+
+    def _record(self, model_name: str, articles: int, tokens: int, seconds: float):
+        with self._lock:
+            stats = self._stats[model_name]
+            stats[0] += articles
+            stats[1] += tokens
+            stats[2] += seconds
+        REGISTRY.add_model(model_name, articles, tokens, seconds)
+        logger.debug(
+            "%s: %d articles, %d tokens in %.2fs", model_name, articles, tokens, seconds
+        )
+
+    def throughput(self) -> Dict[str, dict]:
+        """Articles and input tokens per second of each tier so far."""
+        with self._lock:
+            return {
+                model_name: {
+                    "articles": articles,
+                    "articles_per_sec": articles / seconds if seconds else 0.0,
+                    "tokens_per_sec": tokens / seconds if seconds else 0.0,
+                }
+                for model_name, (articles, tokens, seconds) in self._stats.items()
+            }
@@ -0,0 +1,173 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+from .cache import content_hash
+from .metrics import REGISTRY, Profile, profiling
+
+
+def _copy_outcome(source: Future, target: Future):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class MicroBatchScheduler:
+    """
+    Merges articles from concurrent requests into shared micro-batches.
+
+    Request threads enqueue their articles and block on per-article futures.
+    Worker threads take the oldest pending article and keep collecting until
+    either max_articles are pending or that article has waited max_wait_ms,
+    then summarize the micro-batch in one call and route every summary back
+    to the future of the request it came from. While a micro-batch runs, new
+    arrivals queue up for the next one.
+
+    Articles with different generation presets are summarized in separate
+    calls; articles that share a preset share the tightest latency budget
+    among them. Futures resolve to (summary, model id, profile) triples,
+    where the profile holds the stage timings of the whole micro-batch, and
+    the summarizer is told how many articles are still queued so a
+    ModelRouter can shed load to its distilled tier.
+
+    Futures resolve as soon as their bucket of the micro-batch is done, not
+    when the whole micro-batch is, so the profile keeps filling in while the
+    later buckets run. An article submitted with ``on_partial``
+    has it called with its summary text so far while it decodes greedily.
+
+    Work is single-flight: an article whose content (by normalized content
+    hash) and preset match one that is queued or being summarized waits on
+    that article's result instead of running the model again, e.g. when a
+    redelivered article or a second spider's copy arrives in a concurrent
+    request. A waiting article gets the final summary only, no partial text,
+    and the latency budget of the first one.
+    """
+
+    max_wait_ms = float(os.environ.get("CRISPY_MAX_WAIT_MS", 25))
+    max_articles = int(os.environ.get("CRISPY_MICRO_BATCH_ARTICLES", 16))
+
+    def __init__(
+        self, summarizer, batcher=None, max_wait_ms=None, max_articles=None, workers=1
+    ):
+        if max_wait_ms is not None:
+            self.max_wait_ms = max_wait_ms
+        if max_articles is not None:
+            self.max_articles = max_articles
+
+        self.summarizer = summarizer
+        self.batcher = batcher
+        self._pending = queue.Queue()
+        ## (content hash, preset) -> future of the article doing the work
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        self._workers = [
+            threading.Thread(target=self._run, daemon=True) for _ in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self,
+        article: str,
+        input_ids=None,
+        preset=None,
+        latency_budget_ms=None,
+        on_partial=None,
+    ) -> Future:
+        future = Future()
+        key = (content_hash(article), preset)
+        with self._lock:
+            leader = self._in_flight.get(key)
+            if leader is None:
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+        if leader is not None:
+            leader.add_done_callback(lambda done: _copy_outcome(done, future))
+            return future
+
+        future.add_done_callback(lambda _: self._land(key))
+        item = (article, input_ids, preset, latency_budget_ms, on_partial)
+        self._pending.put((time.monotonic(), item, future))
+        return future
+
+    def _land(self, key):
+        with self._lock:
+            del self._in_flight[key]
+
+    def summarize(
+        self, articles: List[str], input_ids=None, preset=None, latency_budget_ms=None
+    ) -> List[str]:
+        """
+        Summarizes the articles of one request, sharing batches with others.
+        ``input_ids`` optionally holds pre-tokenized ids per article.
+        """
+        input_ids = input_ids or [None] * len(articles)
+        futures = [
+            self.submit(article, ids, preset, latency_budget_ms)
+            for article, ids in zip(articles, input_ids)
+        ]
+        return [future.result()[0] for future in futures]
+
+    def _collect(self):
+        enqueued, item, future = self._pending.get()
+        batch = [(item, future)]
+        deadline = enqueued + self.max_wait_ms / 1000
+        while len(batch) < self.max_articles:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    _, item, future = self._pending.get(timeout=timeout)
+                else:
+                    ## Past the deadline: only take what is already waiting
+                    _, item, future = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            batch.append((item, future))
+        return batch
+
+    def _run(self):
+        while True:
+            groups = {}
+            for item, future in self._collect():
+                groups.setdefault(item[2], []).append((item, future))
+            for preset, batch in groups.items():
+                self._summarize(preset, batch)
+
+    def _summarize(self, preset, batch):
+        articles = [item[0] for item, _ in batch]
+        input_ids = [item[1] for item, _ in batch]
+        budgets = [item[3] for item, _ in batch if item[3]]
+        partials = [item[4] for item, _ in batch]
+        profile = Profile()
+
+        def on_done(positions, results):
+            for position, (summary, model_id) in zip(positions, results):
+                batch[position][1].set_result((summary, model_id, profile))
+
+        def on_partial(position, text):
+            if partials[position] is not None:
+                partials[position](text)
+
+        try:
+            with profiling(profile):
+                self.summarizer.summarize_tagged(
+                    articles,
+                    backlog=self._pending.qsize(),
+                    batcher=self.batcher,
+                    input_ids=input_ids,
+                    preset=preset,
+                    latency_budget_ms=min(budgets, default=None),
+                    on_done=on_done,
+                    on_partial=on_partial if any(partials) else None,
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        REGISTRY.observe(profile)
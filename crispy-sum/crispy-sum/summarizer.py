@@ -1,35 +1,746 @@
-from transformers import BartTokenizer, BartForConditionalGeneration
+import json
+import os
+import threading
+import time
+from typing import List, Optional, Union
+
+from transformers import BartTokenizer, BartTokenizerFast, BartForConditionalGeneration
 import torch
 
+from .backends import SummarizerBackend, create_backend
+from .cache import SummaryCache
+from .extractive import ExtractiveFilter
+from .generation import GenerationPolicy
+from .loader import (
+    FAST_TOKENIZER,
+    MODEL_NAME,
+    load_model,
+    load_tokenizer,
+    tokenizer_version,
+)
+from .metrics import current_profile, ensure_profile, stage
+from .precision import resolve_precision
+
 
 class CrispySummarizer:
     """
     CrispySummarizer is a wrapper class for the BartForConditionalGeneration model
-    from the transformers library. It is used to generate summaries from articles
+    from the transformers library. It is used to generate summaries from articles.
+
+    The model and tokenizer are loaded on first use (or by warm_up) from a
+    memory-mapped safetensors snapshot shared by all processes on the host.
     """
 
     device = "cpu"
-    model = BartForConditionalGeneration.from_pretrained("Yale-LILY/brio-cnndm-uncased")
-    model.to(device)
-    model.eval()
-
-    tokenizer = BartTokenizer.from_pretrained("Yale-LILY/brio-cnndm-uncased")
+    model_name = MODEL_NAME
+    fast_tokenizer = FAST_TOKENIZER
     max_length = 1024
 
-    def __call__(self, article, max_length=120, min_length=40) -> str:
-        # article = article.lower()
-        inputs = self.tokenizer(
-            article,
-            max_length=self.max_length,
-            padding="max_length",
-            return_tensors="pt",
-            truncation=True,
-        ).to(self.device)
-        summary_ids = self.model.generate(
-            inputs["input_ids"], max_length=max_length, min_length=min_length
+    ## "longest" pads each batch to its longest article, "max_length" pads
+    ## every article to max_length (the old behaviour, kept for benchmarking)
+    padding = "longest"
+    bucket_size = 3
+
+    ## One of "fp32", "int8" (dynamic quantization of the Linear layers) or
+    ## "bf16" (autocast, only where the CPU supports it)
+    precision = os.environ.get("CRISPY_PRECISION", "fp32")
+
+    ## "torch" (model.generate, the reference), "onnx" (ONNX Runtime) or
+    ## "assisted" (greedy speculative decoding with draft_model_name)
+    backend = os.environ.get("CRISPY_BACKEND", "torch")
+    draft_model_name = os.environ.get(
+        "CRISPY_DRAFT_MODEL", "sshleifer/distilbart-cnn-12-3"
+    )
+
+    ## Articles longer than this many tokens are cut down to their top ranked
+    ## sentences before encoding; 0 leaves them to truncation at max_length
+    extractive_tokens = int(os.environ.get("CRISPY_EXTRACTIVE_TOKENS", 0))
+
+    ## Long-document mode: articles over max_length are split into up to
+    ## max_windows windows of max_length tokens, overlapping by
+    ## window_overlap, which are summarized like articles of their own; the
+    ## joined window summaries are then summarized into the final one. 0
+    ## leaves long articles to truncation at max_length.
+    max_windows = int(os.environ.get("CRISPY_MAX_WINDOWS", 0))
+    window_overlap = int(os.environ.get("CRISPY_WINDOW_OVERLAP", 128))
+
+    def __init__(
+        self,
+        precision=None,
+        backend=None,
+        cache=None,
+        model_name=None,
+        extractive_tokens=None,
+        near_duplicates=None,
+        max_windows=None,
+    ):
+        if model_name is not None:
+            self.model_name = model_name
+        if extractive_tokens is not None:
+            self.extractive_tokens = extractive_tokens
+        if max_windows is not None:
+            self.max_windows = max_windows
+        self.extractive = None
+        if self.extractive_tokens:
+            self.extractive = ExtractiveFilter(self.extractive_tokens)
+        self.precision = resolve_precision(precision or self.precision)
+        self.backend_name = backend or self.backend
+        self.cache = cache
+        self.near_duplicates = near_duplicates
+        self.policy = GenerationPolicy()
+        self._engine = None
+        self._warmed = False
+        self._tokenizer_version = None
+        self._vocab_size = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> BartForConditionalGeneration:
+        return load_model(self.model_name)
+
+    @property
+    def tokenizer(self) -> Union[BartTokenizer, BartTokenizerFast]:
+        return load_tokenizer(self.model_name, self.fast_tokenizer)
+
+    @property
+    def tokenizer_version(self) -> Optional[str]:
+        """Tag that pre-tokenized articles must carry to skip tokenization."""
+        if self._tokenizer_version is None:
+            self._tokenizer_version = tokenizer_version(
+                self.tokenizer, self.max_length
+            )
+        return self._tokenizer_version
+
+    def accepts_input_ids(self, input_ids: List[int]) -> bool:
+        """
+        Whether pre-tokenized ids fit the model: no longer than max_length and
+        all inside the vocabulary. Anything else would fail in the embedding.
+        """
+        if self._vocab_size is None:
+            self._vocab_size = len(self.tokenizer)
+        return (
+            len(input_ids) <= self.max_length
+            and min(input_ids) >= 0
+            and max(input_ids) < self._vocab_size
         )
+
+    @property
+    def engine(self) -> SummarizerBackend:
+        """The inference backend, created on first use."""
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    model, draft = self.model, None
+                    if self.precision == "int8" and self.backend_name != "onnx":
+                        ## Prequantized in the model registry when available
+                        model = load_model(self.model_name, "int8")
+                    if self.backend_name == "assisted":
+                        draft = load_model(self.draft_model_name)
+                    self._engine = create_backend(
+                        self.backend_name, model, self.precision, draft
+                    )
+        return self._engine
+
+    def warm_up(self):
+        """
+        Loads the weights and tokenizer and runs one short generation, so the
+        first real request does not pay for loading or backend setup.
+        """
+        self.generate(self.encode(["warm up"]), max_length=8, min_length=1)
+        self._warmed = True
+
+    def encode(self, articles: List[str], input_ids=None) -> List[List[int]]:
+        """
+        Tokenizes articles without padding, truncated to max_length. Rows of
+        ``input_ids`` that are set (pre-tokenized upstream) are used as is;
+        only the articles without them are tokenized. With the extractive
+        filter on, articles over extractive_tokens are shortened and
+        tokenized again.
+        """
+        if input_ids is None:
+            input_ids = [None] * len(articles)
+        input_ids = list(input_ids)
+
+        with stage("tokenize"):
+            missing = [i for i, ids in enumerate(input_ids) if ids is None]
+            if missing:
+                tokenized = self._tokenize([articles[i] for i in missing])
+                for i, ids in zip(missing, tokenized):
+                    input_ids[i] = ids
+
+            if self.extractive is not None:
+                limit = self.extractive_tokens
+                long = [i for i, ids in enumerate(input_ids) if len(ids) > limit]
+                if long:
+                    shortened = [
+                        self.extractive(articles[i], self._count_tokens) for i in long
+                    ]
+                    for i, ids in zip(long, self._tokenize(shortened)):
+                        input_ids[i] = ids
+        return input_ids
+
+    def _tokenize(self, articles: List[str]) -> List[List[int]]:
+        return self.tokenizer(
+            articles, max_length=self.max_length, truncation=True
+        )["input_ids"]
+
+    def _windows(self, article: str) -> List[List[int]]:
+        """
+        Overlapping windows of max_length tokens over the article, at most
+        max_windows of them; the article is only tokenized that far.
+        """
+        size = self.max_length - 2
+        stride = size - self.window_overlap
+        with stage("tokenize"):
+            ids = self.tokenizer(
+                article,
+                add_special_tokens=False,
+                max_length=stride * (self.max_windows - 1) + size,
+                truncation=True,
+            )["input_ids"]
+        starts = range(0, max(len(ids) - self.window_overlap, 1), stride)
+        return [
+            self.tokenizer.build_inputs_with_special_tokens(ids[start : start + size])
+            for start in starts[: self.max_windows]
+        ]
+
+    def _count_tokens(self, sentences: List[str]) -> List[int]:
+        encoded = self.tokenizer(sentences, add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    def generate(
+        self,
+        input_ids: List[List[int]],
+        max_length=120,
+        min_length=40,
+        padding=None,
+        max_new_tokens=None,
+        num_beams=None,
+        early_stopping=None,
+        on_step=None,
+    ) -> List[str]:
+        """
+        Pads a batch of token ids and generates one summary per row. Beam
+        count and early stopping default to the model's generation config.
+        ``on_step(row, ids)`` streams greedy decoding, see SummarizerBackend.
+        """
+        if max_new_tokens is not None:
+            ## The decoder start token counts towards max_length
+            max_length = max_new_tokens + 1
+        with stage("tokenize"):
+            inputs = self.tokenizer.pad(
+                {"input_ids": input_ids},
+                padding=padding or self.padding,
+                max_length=self.max_length,
+                return_tensors="pt",
+            ).to(self.device)
+
+        profile = current_profile()
+        encoder_seconds = profile.seconds.get("encoder", 0.0) if profile else 0.0
+        start = time.perf_counter()
+        summary_ids = self.engine.generate(
+            inputs["input_ids"],
+            inputs["attention_mask"],
+            max_length=max_length,
+            min_length=min_length,
+            num_beams=num_beams,
+            early_stopping=early_stopping,
+            on_step=on_step,
+        )
+        if profile is not None:
+            ## The encoder pass is timed by the backend, the rest is decoding
+            encoder_seconds = profile.seconds.get("encoder", 0.0) - encoder_seconds
+            profile.add_time("decode", time.perf_counter() - start - encoder_seconds)
+            self._count(profile, inputs["attention_mask"], summary_ids, num_beams)
+
+        with stage("tokenize"):
+            return self.decode(summary_ids)
+
+    def _count(self, profile, attention_mask, summary_ids, num_beams):
+        rows, steps = summary_ids.shape
+        generated = int((summary_ids != self.model.config.pad_token_id).sum())
+        profile.count(
+            tokens_in=int(attention_mask.sum()),
+            padded_tokens=attention_mask.numel(),
+            ## Every row starts with the decoder start token
+            tokens_out=generated - rows,
+            beam_steps=rows * (steps - 1) * self.engine.beams(num_beams),
+        )
+
+    def decode(self, summary_ids) -> List[str]:
+        """Decodes generated ids, in parallel with the fast tokenizer."""
+        if self.tokenizer.is_fast:
+            ## batch_decode loops over rows in Python; the Rust decode_batch
+            ## spreads them over threads. It never cleans up spaces.
+            return self.tokenizer.backend_tokenizer.decode_batch(
+                summary_ids.tolist(), skip_special_tokens=True
+            )
         return self.tokenizer.batch_decode(
             summary_ids,
             skip_special_tokens=True,
             clean_up_tokenization_spaces=False,
         )
+
+    def _key_params(self, params: dict) -> dict:
+        ## Summaries are stored under the settings the preset chooses without
+        ## a budget; those a budget cut down are not stored at all
+        key_params = {
+            "model": self.model_name,
+            "precision": self.precision,
+            "backend": self.backend_name,
+            "extractive": self.extractive_tokens,
+            **{
+                key: value
+                for key, value in params.items()
+                if key != "latency_budget_ms"
+            },
+        }
+        ## The assisted backend decodes greedily with its draft model,
+        ## whatever num_beams says
+        if self.backend_name == "assisted":
+            key_params["draft"] = self.draft_model_name
+        if self.extractive is not None:
+            key_params["extractive"] = [self.extractive_tokens, self.extractive.method]
+        if self.max_windows:
+            key_params["windows"] = [self.max_windows, self.window_overlap]
+        return key_params
+
+    def _lookup(self, articles: List[str], key_params: dict):
+        """Cache keys, and the cached or near-duplicate summary (or None)."""
+        keys = [SummaryCache.key(article, key_params) for article in articles]
+        summaries = [None] * len(keys)
+        if self.cache is not None:
+            summaries = self.cache.get_many(keys)
+        if self.near_duplicates is not None:
+            scope = json.dumps(key_params, sort_keys=True)
+            found = {}
+            for i, (key, summary) in enumerate(zip(keys, summaries)):
+                if summary is None:
+                    if key not in found:
+                        found[key] = self.near_duplicates.find(articles[i], scope)
+                    summaries[i] = found[key]
+        return keys, summaries
+
+    def lookup(
+        self,
+        articles: List[str],
+        bucket_size=None,
+        batcher=None,
+        preset=None,
+        latency_budget_ms=None,
+        **settings,
+    ) -> List[Optional[str]]:
+        """
+        What summarize_bucketed, called with the same arguments, would serve
+        from the SummaryCache or the near-duplicate index, None for the
+        rest. Nothing is tokenized.
+        """
+        if self.cache is None and self.near_duplicates is None:
+            return [None] * len(articles)
+        params = self._bucketed_params(preset, latency_budget_ms, settings)
+        return self._lookup(articles, self._key_params(params))[1]
+
+    def _bucketed_params(self, preset, latency_budget_ms, settings: dict) -> dict:
+        return {
+            "preset": preset or self.policy.default_preset,
+            "latency_budget_ms": latency_budget_ms or None,
+            **settings,
+        }
+
+    def _cached(
+        self,
+        articles: List[str],
+        summarize,
+        input_ids=None,
+        on_done=None,
+        on_partial=None,
+        **params,
+    ) -> List[str]:
+        """
+        Serves articles from the SummaryCache, then from the near-duplicate
+        index, and runs ``summarize`` only on the misses, each distinct
+        content once. Hits skip tokenization and generation entirely.
+
+        ``on_done(positions, summaries)`` is called as summaries complete,
+        hits first, and ``on_partial(position, text)`` with the text so far
+        of summaries still being generated; positions index ``articles``.
+
+        Under a latency budget, ``summarize`` is also given a ``cut`` set to
+        add the positions whose settings the budget cut down to; those
+        summaries are returned but not stored.
+        """
+        if self.cache is None and self.near_duplicates is None:
+            callbacks = {"on_done": on_done, "on_partial": on_partial}
+            return summarize(
+                articles,
+                input_ids=input_ids,
+                **{key: value for key, value in callbacks.items() if value is not None},
+                **params,
+            )
+
+        key_params = self._key_params(params)
+        keys, summaries = self._lookup(articles, key_params)
+        ## Summaries are only shared between the same model and settings
+        scope = json.dumps(key_params, sort_keys=True)
+
+        misses = {}
+        for i, (key, summary) in enumerate(zip(keys, summaries)):
+            if summary is None:
+                misses.setdefault(key, []).append(i)
+        if on_done is not None:
+            hits = [i for i, summary in enumerate(summaries) if summary is not None]
+            if hits:
+                on_done(hits, [summaries[i] for i in hits])
+        if misses:
+            ## Each miss stands for every article with the same key
+            duplicates = list(misses.values())
+            callbacks = {}
+            if on_done is not None:
+
+                def done(positions, outputs):
+                    expanded, repeated = [], []
+                    for position, output in zip(positions, outputs):
+                        expanded += duplicates[position]
+                        repeated += [output] * len(duplicates[position])
+                    on_done(expanded, repeated)
+
+                callbacks["on_done"] = done
+            if on_partial is not None:
+
+                def partial(position, text):
+                    for i in duplicates[position]:
+                        on_partial(i, text)
+
+                callbacks["on_partial"] = partial
+            cut = set()
+            if params.get("latency_budget_ms"):
+                callbacks["cut"] = cut
+            first = [positions[0] for positions in duplicates]
+            outputs = summarize(
+                [articles[i] for i in first],
+                input_ids=input_ids and [input_ids[i] for i in first],
+                **callbacks,
+                **params,
+            )
+            computed = dict(zip(misses, outputs))
+            stored = {
+                key: summary
+                for position, (key, summary) in enumerate(computed.items())
+                if position not in cut
+            }
+            if self.cache is not None:
+                self.cache.put_many(stored)
+            if self.near_duplicates is not None:
+                for position, (i, summary) in enumerate(zip(first, outputs)):
+                    if position not in cut:
+                        self.near_duplicates.add(articles[i], summary, scope)
+            summaries = [computed.get(key, s) for key, s in zip(keys, summaries)]
+        return summaries
+
+    def summarize_bucketed(
+        self,
+        articles: List[str],
+        bucket_size=None,
+        batcher=None,
+        input_ids=None,
+        preset=None,
+        latency_budget_ms=None,
+        on_done=None,
+        on_partial=None,
+        **settings,
+    ) -> List[str]:
+        """
+        Sorts articles by token length and summarizes them in buckets of
+        similar length, so each bucket is only padded to its own longest
+        article. With a TokenBudgetBatcher the buckets are sized by its token
+        budget and memory ceiling instead of a fixed bucket_size. Summaries
+        are returned in the order of the input. ``input_ids`` optionally
+        holds pre-tokenized ids per article (None where absent).
+
+        Generation settings come from the GenerationPolicy for the preset
+        and latency budget; ``settings`` (num_beams, max_new_tokens,
+        min_length, early_stopping) override what it chooses.
+
+        ``on_done`` and ``on_partial`` stream results as in _cached: each
+        bucket's summaries as soon as it finishes, and the text so far of
+        greedily decoded ones after every token.
+        """
+
+        def summarize(articles, **kwargs):
+            return self._summarize_bucketed(articles, bucket_size, batcher, **kwargs)
+
+        return self._cached(
+            articles,
+            summarize,
+            input_ids=input_ids,
+            on_done=on_done,
+            on_partial=on_partial,
+            **self._bucketed_params(preset, latency_budget_ms, settings),
+        )
+
+    def summarize_tagged(
+        self, articles: List[str], backlog=0, on_done=None, **kwargs
+    ) -> List[tuple]:
+        """
+        Like summarize_bucketed, but returns (summary, model id) pairs, also
+        to ``on_done``. A single model has nothing to route, so ``backlog``
+        is ignored.
+        """
+        if on_done is not None:
+            kwargs["on_done"] = lambda positions, summaries: on_done(
+                positions, [(summary, self.model_name) for summary in summaries]
+            )
+        summaries = self.summarize_bucketed(articles, **kwargs)
+        return [(summary, self.model_name) for summary in summaries]
+
+    def generation_settings(
+        self, lengths: List[int], preset=None, latency_budget_ms=None, **settings
+    ) -> dict:
+        """Settings for one batch of articles with the given token lengths."""
+        chosen = self.policy.choose(
+            max(lengths), len(lengths), preset, latency_budget_ms
+        )
+        chosen.update(settings)
+        return chosen
+
+    def _bucket_settings(
+        self, lengths: List[int], bucket, preset, latency_budget_ms, cut, settings
+    ) -> dict:
+        """
+        generation_settings for one bucket of rows; adds the bucket to
+        ``cut`` if the latency budget changed what would be chosen without it.
+        """
+        bucket_lengths = [lengths[i] for i in bucket]
+        kwargs = self.generation_settings(
+            bucket_lengths, preset, latency_budget_ms, **settings
+        )
+        if cut is not None and latency_budget_ms:
+            if kwargs != self.generation_settings(bucket_lengths, preset, **settings):
+                cut.update(bucket)
+        return kwargs
+
+    def _buckets(self, lengths: List[int], bucket_size=None, batcher=None):
+        """Index buckets of similar length, fixed size or from the batcher."""
+        if batcher is not None:
+            return batcher.batches(lengths)
+        bucket_size = bucket_size or self.bucket_size
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        return (
+            order[start : start + bucket_size]
+            for start in range(0, len(order), bucket_size)
+        )
+
+    def _summarize_bucketed(
+        self,
+        articles: List[str],
+        bucket_size=None,
+        batcher=None,
+        input_ids=None,
+        preset=None,
+        latency_budget_ms=None,
+        on_done=None,
+        on_partial=None,
+        cut=None,
+        **settings,
+    ) -> List[str]:
+        input_ids = self.encode(articles, input_ids)
+
+        def run(input_ids, latency_budget_ms, on_done, on_partial, cut):
+            return self._generate_buckets(
+                input_ids,
+                bucket_size,
+                batcher,
+                preset,
+                latency_budget_ms,
+                on_done,
+                on_partial,
+                cut=cut,
+                **settings,
+            )
+
+        if not self.max_windows:
+            return run(input_ids, latency_budget_ms, on_done, on_partial, cut)
+        return self._map_reduce(
+            articles, input_ids, run, latency_budget_ms, on_done, on_partial, cut
+        )
+
+    def _map_reduce(
+        self, articles, input_ids, run, latency_budget_ms, on_done, on_partial, cut
+    ) -> List[str]:
+        """
+        Long-document mode of _summarize_bucketed. Articles cut at max_length
+        are replaced by their windows, and all rows go through the buckets
+        together, so windows share forward passes with each other and with
+        short articles while the batcher keeps every pass within its token
+        budget. The window summaries of each long article are then joined
+        and summarized in a second bucketed pass. Long articles only reach
+        ``on_done`` and ``on_partial`` in that second pass.
+        """
+        rows, owners, windows = [], [], {}
+        for i, ids in enumerate(input_ids):
+            ## Pre-tokenized ids are truncated too, so length is the only sign
+            chunks = self._windows(articles[i]) if len(ids) >= self.max_length else []
+            if len(chunks) > 1:
+                windows[i] = range(len(rows), len(rows) + len(chunks))
+            else:
+                chunks = [ids]
+            rows += chunks
+            owners += [i] * len(chunks)
+
+        ## Callbacks of the first pass only report the short articles
+        map_done = map_partial = None
+        if on_done is not None:
+
+            def map_done(positions, outputs):
+                done = [
+                    (owners[row], output)
+                    for row, output in zip(positions, outputs)
+                    if owners[row] not in windows
+                ]
+                if done:
+                    on_done([i for i, _ in done], [output for _, output in done])
+
+        if on_partial is not None:
+
+            def map_partial(row, text):
+                if owners[row] not in windows:
+                    on_partial(owners[row], text)
+
+        ## The second pass writes the summaries that are returned, so its
+        ## share of the budget, by row count, is set aside before the first
+        ## pass starts instead of leaving it whatever the windows did not use
+        map_budget = reduce_budget = latency_budget_ms
+        if latency_budget_ms and windows:
+            map_budget = latency_budget_ms * len(rows) / (len(rows) + len(windows))
+            reduce_budget = latency_budget_ms - map_budget
+        start = time.monotonic()
+        map_cut = set() if cut is not None else None
+        outputs = run(rows, map_budget, map_done, map_partial, map_cut)
+        if cut is not None:
+            cut.update(owners[row] for row in map_cut)
+        summaries = [None] * len(articles)
+        for row, i in enumerate(owners):
+            if i not in windows:
+                summaries[i] = outputs[row]
+        if not windows:
+            return summaries
+
+        long = list(windows)
+        with stage("tokenize"):
+            joined = self._tokenize(
+                [" ".join(outputs[row] for row in windows[i]) for i in long]
+            )
+        if latency_budget_ms:
+            ## A first pass that finished early leaves its rest to the second
+            left = latency_budget_ms - (time.monotonic() - start) * 1000
+            latency_budget_ms = max(left, reduce_budget)
+        reduce_done = reduce_partial = None
+        if on_done is not None:
+
+            def reduce_done(positions, outputs):
+                on_done([long[position] for position in positions], outputs)
+
+        if on_partial is not None:
+
+            def reduce_partial(position, text):
+                on_partial(long[position], text)
+
+        reduce_cut = set() if cut is not None else None
+        reduced = run(
+            joined, latency_budget_ms, reduce_done, reduce_partial, reduce_cut
+        )
+        if cut is not None:
+            cut.update(long[position] for position in reduce_cut)
+        for i, summary in zip(long, reduced):
+            summaries[i] = summary
+        return summaries
+
+    def _generate_buckets(
+        self,
+        input_ids: List[List[int]],
+        bucket_size=None,
+        batcher=None,
+        preset=None,
+        latency_budget_ms=None,
+        on_done=None,
+        on_partial=None,
+        cut=None,
+        **settings,
+    ) -> List[str]:
+        """
+        Summarizes encoded rows in buckets, see summarize_bucketed. Rows whose
+        settings the latency budget cut down are added to ``cut``.
+        """
+        lengths = [len(ids) for ids in input_ids]
+        if batcher is not None and not self._warmed:
+            ## Building the backend and faulting in the weights would
+            ## otherwise land in the first batch's memory sample
+            self.warm_up()
+        buckets = self._buckets(lengths, bucket_size, batcher)
+
+        start = time.monotonic()
+        remaining = len(input_ids)
+        summaries = [None] * len(input_ids)
+        for bucket in buckets:
+            budget = None
+            if latency_budget_ms:
+                ## Buckets run one after another: each gets its share of
+                ## what is left of the budget, by article count
+                left = latency_budget_ms - (time.monotonic() - start) * 1000
+                budget = max(left, 1) * len(bucket) / remaining
+            kwargs = self._bucket_settings(
+                lengths, bucket, preset, budget, cut, settings
+            )
+
+            batch_ids = [input_ids[i] for i in bucket]
+            if on_partial is not None:
+                kwargs["on_step"] = self._step_callback(bucket, on_partial)
+            bucket_start = time.perf_counter()
+            if batcher is None:
+                outputs = self.generate(batch_ids, **kwargs)
+            else:
+                padded_tokens = len(bucket) * max(lengths[i] for i in bucket)
+                with batcher.track(padded_tokens):
+                    outputs = self.generate(batch_ids, **kwargs)
+            self.policy.observe(
+                len(bucket) * kwargs["num_beams"],
+                kwargs["max_new_tokens"],
+                time.perf_counter() - bucket_start,
+            )
+            remaining -= len(bucket)
+            for i, summary in zip(bucket, outputs):
+                summaries[i] = summary
+            if on_done is not None:
+                on_done(bucket, outputs)
+        return summaries
+
+    def _step_callback(self, bucket, on_partial):
+        """Turns a backend's on_step into on_partial calls on changed text."""
+        texts = {}
+
+        def on_step(row, ids):
+            text = self.tokenizer.decode(
+                ids, skip_special_tokens=True, clean_up_tokenization_spaces=False
+            )
+            ## Finished rows keep being reported, padded
+            if text != texts.get(row):
+                texts[row] = text
+                on_partial(bucket[row], text)
+
+        return on_step
+
+    def __call__(
+        self, article: Union[str, List[str]], max_length=120, min_length=40, padding=None
+    ) -> str:
+        # article = article.lower()
+        articles = [article] if isinstance(article, str) else list(article)
+
+        def summarize(articles, input_ids=None, **kwargs):
+            return self.generate(
+                self.encode(articles, input_ids), padding=padding, **kwargs
+            )
+
+        with ensure_profile():
+            return self._cached(
+                articles, summarize, max_length=max_length, min_length=min_length
+            )
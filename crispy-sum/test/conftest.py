@@ -0,0 +1,8 @@
+import os
+import sys
+
+## The function folder is named crispy-sum, so tests import it with
+## importlib.import_module("crispy-sum.<module>") from the app root
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_ROOT not in sys.path:
+    sys.path.insert(0, APP_ROOT)
@@ -0,0 +1,85 @@
+import importlib
+import time
+
+import pytest
+
+batcher_module = importlib.import_module("crispy-sum.batcher")
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """A fake RSS the samplers read instead of /proc."""
+    value = [1024 * MB]
+    monkeypatch.setattr(batcher_module, "current_rss", lambda: value[0])
+    return value
+
+
+def run_batch(batcher, rss, padded_tokens, grows_by, keeps=True):
+    with batcher.track(padded_tokens):
+        rss[0] += grows_by
+        if not keeps:
+            ## Long enough for the sampler thread to see the peak
+            time.sleep(0.05)
+            rss[0] -= grows_by
+
+
+def test_budget_holds_after_high_water_mark(rss):
+    batcher = batcher_module.TokenBudgetBatcher(
+        token_budget=100_000, memory_ceiling_mb=1224, max_batch_size=1000
+    )
+    ## The first batch is never sampled
+    run_batch(batcher, rss, 1000, 0)
+    ## 100MB for 1,000 padded tokens; the allocator keeps the memory afterwards
+    run_batch(batcher, rss, 1000, 100 * MB)
+    for _ in range(10):
+        run_batch(batcher, rss, 1000, 0)
+
+    ## 100MB of headroom left: at most 1,000 padded tokens per batch
+    batches = list(batcher.batches([100] * 30))
+    assert max(len(batch) for batch in batches) == 10
+    assert batcher.bytes_per_token == 100 * MB / 1000
+
+
+def test_no_ceiling_only_token_budget(rss):
+    batcher = batcher_module.TokenBudgetBatcher(token_budget=400, max_batch_size=16)
+    run_batch(batcher, rss, 1000, 100 * MB)
+    batches = list(batcher.batches([100] * 10))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_shortest_first_and_oversized_alone(rss):
+    batcher = batcher_module.TokenBudgetBatcher(token_budget=250, max_batch_size=16)
+    batches = list(batcher.batches([500, 50, 100, 60]))
+    assert batches == [[1, 3], [2], [0]]
+
+
+def test_one_off_jump_in_first_batch_is_not_kept(rss):
+    batcher = batcher_module.TokenBudgetBatcher(
+        token_budget=100_000, memory_ceiling_mb=3072 + 500, max_batch_size=1000
+    )
+    ## Faulting in 2GB of weights, which stay resident
+    run_batch(batcher, rss, 1000, 2048 * MB)
+    for _ in range(3):
+        run_batch(batcher, rss, 1000, 100 * MB, keeps=False)
+
+    ## 500MB of headroom at 100KB per token: 5,000 padded tokens
+    batches = list(batcher.batches([100] * 100))
+    assert max(len(batch) for batch in batches) == 50
+
+
+def test_small_batches_do_not_cap_large_ones(rss):
+    batcher = batcher_module.TokenBudgetBatcher(
+        token_budget=100_000, memory_ceiling_mb=1024 + 500, max_batch_size=1000
+    )
+    batcher.observe(1, 0)
+    ## 40MB per batch plus 100KB per padded token
+    for padded_tokens in (100, 1000, 2000):
+        batcher.observe(padded_tokens, 40 * MB + padded_tokens * MB // 10)
+    assert batcher.fixed_bytes == pytest.approx(40 * MB)
+    assert batcher.bytes_per_token == pytest.approx(MB / 10)
+
+    ## 440MB predicted for 4,000 tokens; the small batch alone, at 500KB per
+    ## token, would have allowed 1,000
+    assert list(batcher.batches([400] * 10)) == [list(range(10))]
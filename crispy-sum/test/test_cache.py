@@ -0,0 +1,84 @@
+import importlib
+import itertools
+
+import pytest
+
+cache_module = importlib.import_module("crispy-sum.cache")
+
+MB = 1024 * 1024
+
+
+class Clock:
+    """Stands in for the time module, one second per call."""
+
+    def __init__(self):
+        self._ticks = itertools.count(1)
+
+    def time(self):
+        return float(next(self._ticks))
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    ## Distinct last_used values, so the LRU order is deterministic
+    monkeypatch.setattr(cache_module, "time", Clock())
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "summaries.db")
+
+
+def summary(letter, mb=0.4):
+    return letter * int(mb * MB)
+
+
+def test_no_memory_entries_still_hits_disk(path):
+    cache = cache_module.SummaryCache(path, memory_entries=0)
+    cache.put_many({"a": "first"})
+    assert len(cache._memory) == 0
+    assert cache.get_many(["a", "b"]) == ["first", None]
+
+
+def test_one_memory_entry_keeps_the_last_used(path):
+    cache = cache_module.SummaryCache(path, memory_entries=1)
+    cache.put_many({"a": "first", "b": "second"})
+    assert list(cache._memory) == ["b"]
+    ## Served from disk, and remembered in place of b
+    assert cache.get_many(["a"]) == ["first"]
+    assert list(cache._memory) == ["a"]
+
+
+def test_new_cache_reloads_from_disk(path):
+    cache_module.SummaryCache(path).put_many({"a": "first", "b": "second"})
+    reloaded = cache_module.SummaryCache(path)
+    assert reloaded.get_many(["b", "a", "c"]) == ["second", "first", None]
+
+
+def test_memory_only_cache_forgets_on_reload():
+    cache_module.SummaryCache().put_many({"a": "first"})
+    assert cache_module.SummaryCache().get_many(["a"]) == [None]
+
+
+def test_least_recently_used_is_evicted_past_max_disk_mb(path):
+    cache = cache_module.SummaryCache(path, memory_entries=0, max_disk_mb=1)
+    cache.put_many({"a": summary("a")})
+    cache.put_many({"b": summary("b")})
+    ## Reading a makes b the least recently used
+    assert cache.get_many(["a"]) == [summary("a")]
+    cache.put_many({"c": summary("c")})
+    assert cache.get_many(["a", "b", "c"]) == [summary("a"), None, summary("c")]
+
+
+def test_eviction_frees_just_enough(path):
+    cache = cache_module.SummaryCache(path, memory_entries=0, max_disk_mb=1)
+    for letter in "abc":
+        cache.put_many({letter: summary(letter, 0.3)})
+    ## 1.2 MB only needs the oldest entry gone
+    cache.put_many({"d": summary("d", 0.3)})
+    assert cache.get_many(["a", "b", "c", "d"]) == [
+        None,
+        summary("b", 0.3),
+        summary("c", 0.3),
+        summary("d", 0.3),
+    ]
@@ -0,0 +1,70 @@
+import importlib
+
+import pytest
+import zstandard
+
+compression = importlib.import_module("crispy-sum.compression")
+
+BODY = b"The company announced a new line of laptops aimed at students. " * 50
+
+
+@pytest.fixture(scope="module")
+def dictionary_path(tmp_path_factory):
+    samples = [
+        f"Article {i}: regulators opened an investigation into deal {i}.".encode()
+        for i in range(2000)
+    ]
+    path = tmp_path_factory.mktemp("zstd") / "news.dict"
+    path.write_bytes(zstandard.train_dictionary(4096, samples).as_bytes())
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("zstd", True),
+        ("gzip, ZSTD;q=0.5", True),
+        ("zstd;q=0", False),
+        ("gzip, br", False),
+        (None, False),
+    ],
+)
+def test_accepts(header, expected):
+    assert compression.accepts(header) is expected
+
+
+def test_round_trip():
+    codec = compression.ZstdCodec()
+    assert codec.decompress(codec.compress(BODY)) == BODY
+
+
+def test_chunks_decode_as_they_arrive():
+    codec = compression.ZstdCodec()
+    chunks = [BODY[i : i + 100] for i in range(0, len(BODY), 100)]
+    compressed = list(codec.compress_chunks(chunks))
+    assert b"".join(codec.decompress_chunks(compressed)) == BODY
+    ## Every chunk is flushed, so the first one decodes on its own
+    first = next(codec.decompress_chunks(compressed[:1]))
+    assert BODY.startswith(first) and first
+
+
+def test_agrees_only_with_the_same_dictionary(dictionary_path):
+    plain = compression.ZstdCodec()
+    with_dictionary = compression.ZstdCodec(dictionary_path)
+    assert plain.agrees(plain.advertised_headers())
+    assert with_dictionary.agrees(with_dictionary.advertised_headers())
+    assert not plain.agrees(with_dictionary.advertised_headers())
+    assert not with_dictionary.agrees(plain.advertised_headers())
+    assert not plain.agrees({})
+
+
+def test_other_dictionary_fails_loudly(dictionary_path):
+    body = compression.ZstdCodec(dictionary_path).compress(BODY)
+    with pytest.raises(compression.DecompressionError):
+        compression.ZstdCodec().decompress(body)
+
+
+def test_truncated_body_fails():
+    body = compression.ZstdCodec().compress(BODY)
+    with pytest.raises(compression.DecompressionError):
+        compression.ZstdCodec().decompress(body[: len(body) // 2])
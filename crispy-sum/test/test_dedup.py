@@ -0,0 +1,46 @@
+import importlib
+
+dedup = importlib.import_module("crispy-sum.dedup")
+
+STORY = (
+    "Regulators in the EU have opened an investigation into the acquisition "
+    "of the chip designer, citing concerns that the deal would reduce "
+    "competition in the market for data center processors and raise prices "
+    "for cloud providers across Europe over the coming years."
+)
+
+
+def test_rewritten_copy_reuses_the_summary():
+    index = dedup.NearDuplicateIndex(threshold=0.7)
+    index.add(STORY, "EU probes chip deal.")
+    copy = STORY.replace("over the coming years.", "in the coming years, it said.")
+    assert index.find(copy) == "EU probes chip deal."
+    assert index.hits == 1
+
+
+def test_unrelated_article_misses():
+    index = dedup.NearDuplicateIndex(threshold=0.7)
+    index.add(STORY, "EU probes chip deal.")
+    other = "The startup raised forty million dollars in a series B round led by "
+    assert index.find(other * 3) is None
+
+
+def test_scopes_are_separate():
+    index = dedup.NearDuplicateIndex(threshold=0.7)
+    index.add(STORY, "EU probes chip deal.", scope="quality")
+    assert index.find(STORY, scope="fast") is None
+    assert index.find(STORY, scope="quality") == "EU probes chip deal."
+
+
+def test_oldest_entries_are_evicted():
+    index = dedup.NearDuplicateIndex(threshold=0.7, max_entries=1)
+    index.add(STORY, "first")
+    index.add("An entirely different story about laptops for students " * 3, "second")
+    assert len(index) == 1
+    assert index.find(STORY) is None
+
+
+def test_expired_entries_are_dropped():
+    index = dedup.NearDuplicateIndex(threshold=0.7, window_seconds=-1)
+    index.add(STORY, "EU probes chip deal.")
+    assert index.find(STORY) is None
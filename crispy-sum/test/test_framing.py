@@ -0,0 +1,39 @@
+import importlib
+
+import pytest
+
+framing = importlib.import_module("crispy-sum.framing")
+article_pb2 = importlib.import_module("crispy-sum.article_pb2")
+
+
+def articles(count):
+    return [
+        article_pb2.Article(article_id=str(i), content="word " * (i * 40))
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 300, 1 << 20])
+def test_messages_survive_any_chunking(chunk_size):
+    messages = articles(6)
+    stream = b"".join(framing.frame(message) for message in messages)
+    chunks = [stream[i : i + chunk_size] for i in range(0, len(stream), chunk_size)]
+    assert list(framing.read_messages(chunks, article_pb2.Article)) == messages
+
+
+def test_varint_lengths():
+    assert framing.encode_varint(0) == b"\x00"
+    assert framing.encode_varint(127) == b"\x7f"
+    assert framing.encode_varint(300) == b"\xac\x02"
+
+
+def test_truncated_stream_fails():
+    stream = framing.frame(articles(2)[1])
+    with pytest.raises(ValueError, match="ended inside a frame"):
+        list(framing.read_frames([stream[:-1]]))
+
+
+def test_oversized_frame_fails():
+    header = framing.encode_varint(framing.MAX_FRAME_BYTES + 1)
+    with pytest.raises(ValueError, match="exceeds"):
+        list(framing.read_frames([header]))
@@ -0,0 +1,34 @@
+import importlib
+
+metrics = importlib.import_module("crispy-sum.metrics")
+
+
+def test_render_histograms_counters_and_gauges():
+    registry = metrics.MetricsRegistry(buckets=(0.1, 1.0))
+    profile = metrics.Profile()
+    profile.add_time("encoder", 0.5)
+    profile.count(tokens_in=12)
+    registry.observe(profile)
+    registry.set_gauge("first_summary_seconds", 2.5, "Import to first summary.")
+
+    lines = registry.render().splitlines()
+    assert 'crispy_stage_seconds_bucket{stage="encoder",le="0.1"} 0' in lines
+    assert 'crispy_stage_seconds_bucket{stage="encoder",le="1.0"} 1' in lines
+    assert "crispy_tokens_in_total 12" in lines
+    assert "# TYPE crispy_first_summary_seconds gauge" in lines
+    assert "crispy_first_summary_seconds 2.5" in lines
+
+
+def test_render_counters_per_model():
+    registry = metrics.MetricsRegistry()
+    assert "crispy_model_articles_total" not in registry.render()
+    registry.add_model("distilled", 2, 300, 0.5)
+    registry.add_model("full", 1, 900, 1.5)
+    registry.add_model("distilled", 3, 100, 0.25)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE crispy_model_articles_total counter" in lines
+    assert 'crispy_model_articles_total{model="distilled"} 5' in lines
+    assert 'crispy_model_tokens_total{model="distilled"} 400' in lines
+    assert 'crispy_model_seconds_total{model="distilled"} 0.75' in lines
+    assert 'crispy_model_articles_total{model="full"} 1' in lines
@@ -0,0 +1,63 @@
+import importlib
+
+import pytest
+import torch
+from transformers import BartConfig, BartForConditionalGeneration
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+backends = importlib.import_module("crispy-sum.backends")
+onnx_backend = importlib.import_module("crispy-sum.onnx_backend")
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    config = BartConfig(
+        vocab_size=64,
+        d_model=32,
+        encoder_layers=2,
+        decoder_layers=2,
+        encoder_attention_heads=2,
+        decoder_attention_heads=2,
+        encoder_ffn_dim=32,
+        decoder_ffn_dim=32,
+        max_position_embeddings=64,
+        ## The processors the ONNX beam search reimplements
+        no_repeat_ngram_size=3,
+        forced_bos_token_id=0,
+        forced_eos_token_id=2,
+        length_penalty=2.0,
+        num_beams=4,
+    )
+    return BartForConditionalGeneration(config).eval()
+
+
+@pytest.fixture(scope="module")
+def onnx(model, tmp_path_factory):
+    cache_dir = onnx_backend.CACHE_DIR
+    onnx_backend.CACHE_DIR = str(tmp_path_factory.mktemp("onnx"))
+    try:
+        yield onnx_backend.OnnxBackend(model)
+    finally:
+        onnx_backend.CACHE_DIR = cache_dir
+
+
+@pytest.mark.parametrize("early_stopping", [True, False])
+@pytest.mark.parametrize("num_beams", [1, 2, 4])
+def test_matches_torch_backend(model, onnx, num_beams, early_stopping):
+    torch.manual_seed(1)
+    input_ids = torch.randint(3, 64, (3, 12))
+    attention_mask = torch.ones_like(input_ids)
+    ## One padded row
+    input_ids[1, 8:] = model.config.pad_token_id
+    attention_mask[1, 8:] = 0
+
+    settings = dict(
+        max_length=20, min_length=5, num_beams=num_beams, early_stopping=early_stopping
+    )
+    expected = backends.TorchBackend(model).generate(
+        input_ids, attention_mask, **settings
+    )
+    actual = onnx.generate(input_ids, attention_mask, **settings)
+    assert actual.tolist() == expected.tolist()
@@ -0,0 +1,86 @@
+import importlib
+import threading
+import time
+
+import pytest
+
+scheduler_module = importlib.import_module("crispy-sum.scheduler")
+
+
+class BlockingSummarizer:
+    """Records every call and holds it until released."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def summarize_tagged(self, articles, on_done=None, **kwargs):
+        self.calls.append(list(articles))
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        results = [(article.upper(), "fake") for article in articles]
+        on_done(range(len(articles)), results)
+
+
+@pytest.fixture
+def summarizer():
+    summarizer = BlockingSummarizer()
+    yield summarizer
+    summarizer.release.set()
+
+
+def test_identical_articles_share_one_model_call(summarizer):
+    scheduler = scheduler_module.MicroBatchScheduler(summarizer, max_wait_ms=0)
+    leader = scheduler.submit("Same  article")
+    assert summarizer.started.wait(5)
+    ## Differs only in whitespace, so it has the same content hash
+    follower = scheduler.submit("Same article")
+    assert scheduler.coalesced == 1
+
+    summarizer.release.set()
+    assert leader.result(5)[0] == "SAME  ARTICLE"
+    assert follower.result(5)[0] == "SAME  ARTICLE"
+    assert summarizer.calls == [["Same  article"]]
+
+
+def test_other_preset_is_not_coalesced(summarizer):
+    scheduler = scheduler_module.MicroBatchScheduler(summarizer, max_wait_ms=0)
+    first = scheduler.submit("Same article")
+    assert summarizer.started.wait(5)
+    second = scheduler.submit("Same article", preset="fast")
+    assert scheduler.coalesced == 0
+
+    summarizer.release.set()
+    first.result(5), second.result(5)
+    assert len(summarizer.calls) == 2
+
+
+def test_leader_exception_reaches_followers():
+    summarizer = BlockingSummarizer(error=RuntimeError("model failed"))
+    scheduler = scheduler_module.MicroBatchScheduler(summarizer, max_wait_ms=0)
+    leader = scheduler.submit("Same article")
+    assert summarizer.started.wait(5)
+    follower = scheduler.submit("Same article")
+
+    summarizer.release.set()
+    for future in (leader, follower):
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(5)
+
+
+def test_landed_article_runs_again(summarizer):
+    summarizer.release.set()
+    scheduler = scheduler_module.MicroBatchScheduler(summarizer, max_wait_ms=0)
+    scheduler.submit("Same article").result(5)
+    ## The leader's done callback clears the in-flight entry right after it
+    deadline = time.monotonic() + 5
+    while scheduler._in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    scheduler.submit("Same article").result(5)
+    assert scheduler.coalesced == 0
+    assert len(summarizer.calls) == 2
@@ -0,0 +1,60 @@
+"""Builds the local model registry so the function never touches the hub.
+
+Run it at image build or deploy time from the function app root, e.g.
+
+    CRISPY_MODEL_CACHE=models python tools/prepare_models.py --variants int8
+
+and ship the directory with the app. At run time, set CRISPY_MODEL_CACHE
+to the same directory and CRISPY_OFFLINE=1: the weights are memory-mapped
+from the safetensors snapshot, tokenizer and configs are read from disk,
+and a missing snapshot is an error instead of a download.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    sys.path.insert(0, APP_ROOT)
+    loader = importlib.import_module("crispy-sum.loader")
+    registry = importlib.import_module("crispy-sum.registry")
+    summarizer = importlib.import_module("crispy-sum.summarizer")
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "models",
+        nargs="*",
+        help="defaults to the full, distilled and draft models",
+    )
+    parser.add_argument("--variants", nargs="*", default=[], choices=registry.VARIANTS)
+    parser.add_argument("--list", action="store_true", help="show the registry")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.list:
+        print(json.dumps(registry.snapshots(), indent=2))
+        return
+
+    models = args.models or [
+        name
+        for name in (
+            loader.MODEL_NAME,
+            loader.DISTILLED_MODEL_NAME,
+            summarizer.CrispySummarizer.draft_model_name,
+        )
+        if name
+    ]
+    for name in models:
+        manifest = registry.prepare(name, args.variants)
+        print(f"{name}: {', '.join(manifest['variants'])}")
+
+
+if __name__ == "__main__":
+    main()
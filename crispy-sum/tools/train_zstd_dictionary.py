@@ -0,0 +1,70 @@
+"""Trains the shared zstd dictionary for article and summary bodies.
+
+Input is one or more JSON-lines dumps of scraped articles, e.g. a
+mongoexport of the crawl, with content, title, url and date fields. Every
+article becomes one serialized Article message, the unit the listener
+sends, so the dictionary learns the field layout and recurring sites as
+well as news phrasing:
+
+    python tools/train_zstd_dictionary.py crawl.jsonl --output news.dict
+
+Ship the same file to the function (CRISPY_ZSTD_DICTIONARY) and the
+listener (ZSTD_DICTIONARY). A new dictionary gets a new id, so deploy it
+to the function before the listener.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+
+import zstandard
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    sys.path.insert(0, APP_ROOT)
+    article_pb2 = importlib.import_module("crispy-sum.article_pb2")
+    compression = importlib.import_module("crispy-sum.compression")
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("dumps", nargs="+")
+    parser.add_argument("--output", default="news.dict")
+    parser.add_argument("--size", type=int, default=64 * 1024, help="bytes")
+    parser.add_argument("--level", type=int, default=compression.LEVEL)
+    args = parser.parse_args()
+
+    samples = []
+    for path in args.dumps:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                article = article_pb2.Article(
+                    article_id=str(record.get("article_id", "")),
+                    title=record.get("title", ""),
+                    url=record.get("url", ""),
+                    content=record.get("content", ""),
+                    date=record.get("date", ""),
+                )
+                samples.append(article.SerializeToString())
+
+    ## zstd wants roughly 100 times the dictionary size in samples
+    total = sum(len(sample) for sample in samples)
+    if total < 10 * args.size:
+        print(f"warning: {total} bytes of samples for a {args.size} byte dictionary")
+    dictionary = zstandard.train_dictionary(args.size, samples, level=args.level)
+    with open(args.output, "wb") as f:
+        f.write(dictionary.as_bytes())
+    print(
+        f"{args.output}: id {dictionary.dict_id()}, {len(dictionary)} bytes "
+        f"from {len(samples)} articles"
+    )
+
+
+if __name__ == "__main__":
+    main()
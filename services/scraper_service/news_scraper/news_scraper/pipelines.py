@@ -91,12 +91,14 @@ class MessageQueuePipeline:
         rmq_port,
         rmq_user,
         rmq_pass,
+        rmq_content_encoding=None,
     ):
         print("Initializing RMQ pipeline")
         self.rmq_host = rmq_host
         self.rmq_port = rmq_port
         self.rmq_user = rmq_user
         self.rmq_pass = rmq_pass
+        self.rmq_content_encoding = rmq_content_encoding or None
         self.rmq_queue = "article_queue"
         self.rmq_exchange = "article_exchange"
         self.rmq_routing_key = "scraped.article"
@@ -128,6 +130,7 @@ class MessageQueuePipeline:
             rmq_port=crawler.settings.get("RMQ_PORT", 5672),
             rmq_user=crawler.settings.get("RMQ_USER"),
             rmq_pass=crawler.settings.get("RMQ_PASS"),
+            rmq_content_encoding=crawler.settings.get("RMQ_CONTENT_ENCODING"),
         )
 
     def open_spider(self, spider):
@@ -155,6 +158,7 @@ class MessageQueuePipeline:
                     payload=ItemAdapter(item).asdict(),
                     properties=pika.BasicProperties(
                         content_type="application/json",
+                        content_encoding=self.rmq_content_encoding,
                         delivery_mode=2,
                         type=self.rmq_routing_key,
                     ),
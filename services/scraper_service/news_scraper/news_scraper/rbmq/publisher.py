@@ -204,7 +204,7 @@ class Publisher:
             self.channel.basic_publish(
                 exchange=self.type_config.exchange_name,
                 routing_key=self.type_config.routing_key,
-                body=message.to_json(),
+                body=message.to_body(),
                 properties=message.properties,
                 mandatory=message.mandatory,
             )
@@ -2,9 +2,13 @@ import json
 from typing import Any, Dict, Optional
 
 import pika
+import zstandard
 
 """This module contains the base class for all messages sent over RabbitMQ. """
 
+## content_encoding of message bodies compressed with zstd
+ZSTD_ENCODING = "zstd"
+
 
 class RMQMessage(object):
 
@@ -56,6 +60,22 @@ class RMQMessage(object):
         message_dict["properties"] = properties
         return cls.from_dict(message_dict)
 
+    @classmethod
+    def from_body(
+        cls, body: bytes, properties: Optional[pika.BasicProperties] = None
+    ) -> "RMQMessage":
+        """Creates a message object from a delivered body, decompressing it if
+        the properties' content_encoding is zstd.
+        Args:
+            body (bytes): The body of the delivered message.
+            properties (pika.BasicProperties): The properties of the message.
+        Returns:
+            RMQMessage: A message object.
+        """
+        if getattr(properties, "content_encoding", None) == ZSTD_ENCODING:
+            body = zstandard.ZstdDecompressor().decompress(body)
+        return cls.from_json(body, properties=properties)
+
     def __repr__(self) -> str:
         """Returns a string representation of the message object.
         Returns:
@@ -79,3 +99,14 @@ class RMQMessage(object):
             str: A JSON representation of the message object.
         """
         return json.dumps(self.to_dict())
+
+    def to_body(self) -> bytes:
+        """Returns the body to publish: the JSON representation, compressed
+        with zstd if the properties' content_encoding asks for it.
+        Returns:
+            bytes: The body of the message.
+        """
+        body = self.to_json().encode("utf-8")
+        if getattr(self.properties, "content_encoding", None) == ZSTD_ENCODING:
+            body = zstandard.ZstdCompressor().compress(body)
+        return body
@@ -29,6 +29,8 @@ RMQ_PASS = os.environ.get("RMQ_PASS")
 RMQ_QUEUE = os.environ.get("RMQ_QUEUE")
 RMQ_EXCHANGE = os.environ.get("RMQ_EXCHANGE")
 RMQ_ROUTING_KEY = os.environ.get("RMQ_ROUTING_KEY")
+# Article bodies are compressed with zstd; empty publishes plain JSON
+RMQ_CONTENT_ENCODING = os.environ.get("RMQ_CONTENT_ENCODING", "zstd")
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
 # USER_AGENT = "news_scraper (+http://www.yourdomain.com)"
@@ -3,19 +3,41 @@ import logging
 import os
 import re
 import time
+from typing import Iterable, Iterator, List
 
+import grpc
 import pika
 import pymongo
 import requests
 from summarizer.article_pb2 import Article, ArticleBatch
+from summarizer.compression import ZSTD_ENCODING, ZstdCodec
+from summarizer.framing import STREAM_CONTENT_TYPE, frame, read_messages
 from summarizer.rbmq.listener import Listener
 from summarizer.rbmq.publisher import Publisher
 from summarizer.rbmq.rbmqtypes import RMQMessage
 from summarizer.summary_pb2 import Summary, SummaryBatch
+from summarizer.tokenization import ArticleTokenizer
 from summarizer.worker_queues import WorkerQueue
 
-## FLAG to enable summarization service
-SUMMARIZATION_SERVICE_ENABLED = False
+## FLAG to enable summarization service; on by default once a gRPC target
+## for the summarizer is configured
+SUMMARIZATION_SERVICE_ENABLED = (
+    os.environ.get(
+        "SUMMARIZATION_SERVICE_ENABLED",
+        "1" if os.environ.get("SUMMARIZER_GRPC_TARGET") else "0",
+    )
+    != "0"
+)
+## FLAG to send pre-tokenized articles, moving tokenization off the inference hosts
+PRETOKENIZE_ARTICLES = os.environ.get("PRETOKENIZE_ARTICLES", "1") != "0"
+## FLAG to stream articles and summaries as length-delimited frames, so
+## neither side holds a whole batch in memory
+STREAM_SUMMARIES = os.environ.get("STREAM_SUMMARIES", "0") != "0"
+## FLAG to compress request and response bodies with zstd once the
+## summarizer advertises it with the same dictionary (ZSTD_DICTIONARY, the
+## shared news dictionary, if any); gRPC calls use its built-in gzip instead
+COMPRESS_BODIES = os.environ.get("COMPRESS_BODIES", "1") != "0"
+ZSTD_DICTIONARY = os.environ.get("ZSTD_DICTIONARY")
 
 
 class ScrapedArticleListener:
@@ -38,8 +60,19 @@ class ScrapedArticleListener:
 
     EXCHANGE_TYPE = "topic"
     BATCH_SIZE = 10
+    ## Streamed summaries are stored and published in groups of this size
+    PUBLISH_BATCH_SIZE = 5
+    READ_CHUNK_BYTES = 64 * 1024
 
     API_URL = "http://host.docker.internal:7071/api/crispy-sum"
+    ## host:port of the long-lived gRPC summarizer; when set it is used
+    ## instead of the HTTP function
+    GRPC_TARGET = os.environ.get("SUMMARIZER_GRPC_TARGET", "")
+
+    ## Generation preset ("fast", "balanced", "quality") and latency budget
+    ## per batch; empty and 0 leave the choice to the summarizer
+    GENERATION_PRESET = os.environ.get("SUMMARY_GENERATION_PRESET", "")
+    LATENCY_BUDGET_MS = int(os.environ.get("SUMMARY_LATENCY_BUDGET_MS", 0))
 
     def __init__(self):
         ## Set up logging
@@ -93,6 +126,28 @@ class ScrapedArticleListener:
                 "Summarization Model is disabled. Normal summary will be passed"
             )
 
+        self._tokenizer = None
+        if SUMMARIZATION_SERVICE_ENABLED and PRETOKENIZE_ARTICLES:
+            self._tokenizer = ArticleTokenizer()
+
+        self._codec = None
+        if SUMMARIZATION_SERVICE_ENABLED and COMPRESS_BODIES:
+            self._codec = ZstdCodec(ZSTD_DICTIONARY)
+        ## Learnt from the summarizer's responses; the first request is plain
+        self._peer_decompresses = False
+
+        self._summarize_stream = None
+        if SUMMARIZATION_SERVICE_ENABLED and self.GRPC_TARGET:
+            channel = grpc.insecure_channel(
+                self.GRPC_TARGET,
+                compression=grpc.Compression.Gzip if COMPRESS_BODIES else None,
+            )
+            self._summarize_stream = channel.stream_stream(
+                "/Summarizer/SummarizeStream",
+                request_serializer=ArticleBatch.SerializeToString,
+                response_deserializer=Summary.FromString,
+            )
+
     def _preprocess_text(self, text):
         # Remove URLs
         text = re.sub(r"http\S+", "", text)
@@ -106,77 +161,201 @@ class ScrapedArticleListener:
         text = " ".join(text.split())
         return text
 
+    def _make_article(self, payload) -> Article:
+        article = Article()
+        article.article_id = payload.get("article_id")
+        article.url = payload.get("url")
+        article.title = payload.get("title")
+        article.content = self._preprocess_text(payload.get("content"))
+        article.date = payload.get("date")
+        return article
+
+    def _make_articles(self, payloads) -> List[Article]:
+        articles = [self._make_article(payload) for payload in payloads]
+        if self._tokenizer is not None and articles:
+            ## One call for the whole batch, which the fast tokenizer
+            ## encodes in parallel
+            encoded = self._tokenizer.encode([article.content for article in articles])
+            for article, input_ids in zip(articles, encoded):
+                article.input_ids.extend(input_ids)
+                article.tokenizer_version = self._tokenizer.version
+        return articles
+
     def _fetch_summary(self, article_batch):
         ## 1. Make a request to the summarization service
 
         self._log.info("Fetching summary...")
 
-        article_list = ArticleBatch()
-        for payload in article_batch:
-            article = Article()
-            article.article_id = payload.get("article_id")
-            article.url = payload.get("url")
-            article.title = payload.get("title")
-            article.content = self._preprocess_text(payload.get("content"))
-            article.date = payload.get("date")
-
-            article_list.articles.append(article)
-
-        ## 4. Deserialize the response
-        summary_list = SummaryBatch()
+        ## Batch settings only; the articles are sent, or streamed, separately
+        article_list = ArticleBatch(
+            generation_preset=self.GENERATION_PRESET,
+            latency_budget_ms=self.LATENCY_BUDGET_MS,
+        )
+        articles = self._make_articles(article_batch)
 
         if SUMMARIZATION_SERVICE_ENABLED:
-            response = self._summarization_request(article_list=article_list)
-            summary_list.ParseFromString(response.content)
-
+            summaries = self._summarization_request(article_list, articles)
         else:
-            for article in article_list.articles:
-                summary = Summary()
-                summary.article_id = article.article_id
-                summary.summary = article.content
-                summary.date = article.date
-                summary.url = article.url
-                summary.title = article.title
-
-                self._log.info(f"Summary for {article.article_id} is {summary.summary}")
-                summary_list.summaries.append(summary)
+            summaries = self._passthrough_summaries(articles)
 
         ## 5. Store the summary in the database
         if self.publisher_queue.status == WorkerQueue.Status.stopped:
             self.publisher_queue.start()
 
-        self.publisher_queue.add_task(summary_list)
-
-    def _summarization_request(self, article_list: ArticleBatch):
-        ## 2. Serialze the article_list
-        serialized_article_list = article_list.SerializeToString()
+        ## Streamed summaries are stored in small groups as they arrive
+        group_size = self.PUBLISH_BATCH_SIZE if STREAM_SUMMARIES else None
+        summary_list = SummaryBatch()
+        for summary in summaries:
+            summary_list.summaries.append(summary)
+            if len(summary_list.summaries) == group_size:
+                self.publisher_queue.add_task(summary_list)
+                summary_list = SummaryBatch()
+        if summary_list.summaries:
+            self.publisher_queue.add_task(summary_list)
+
+    def _passthrough_summaries(self, articles: Iterable[Article]) -> Iterator[Summary]:
+        for article in articles:
+            summary = Summary()
+            summary.article_id = article.article_id
+            summary.summary = article.content
+            summary.date = article.date
+            summary.url = article.url
+            summary.title = article.title
+
+            self._log.info(f"Summary for {article.article_id} is {summary.summary}")
+            yield summary
+
+    def _summarization_request(
+        self, article_list: ArticleBatch, articles: List[Article]
+    ) -> Iterator[Summary]:
+        if self._summarize_stream is not None:
+            yield from self._grpc_request(article_list, articles)
+            return
 
+        count = "streamed" if STREAM_SUMMARIES else len(articles)
         self._log.info(
-            f"[{datetime.datetime.now()}]- [x] Fetching summary for {len(article_list.articles)} articles...]"
+            f"[{datetime.datetime.now()}]- [x] Fetching summary for {count} articles...]"
         )
 
         start_time = time.time()
-        response = requests.post(
-            self.API_URL, data=serialized_article_list, timeout=1200
-        )
+        compressed = self._codec is not None and self._peer_decompresses
+        response = self._post(article_list, articles, compressed)
+        if response.status_code == 415 and compressed:
+            ## The summarizer lost our dictionary, e.g. it restarted with
+            ## another one: the batch is already acked, so send it once more
+            ## uncompressed rather than drop it
+            response.close()
+            self._log.warning(
+                f"[{datetime.datetime.now()}]- [!] Summarizer refused zstd, retrying uncompressed]"
+            )
+            response = self._post(article_list, articles, compressed=False)
+
+        ## Closed on every path, so an error response or an abandoned stream
+        ## does not keep its pooled connection
+        with response:
+            if response.status_code != 200:
+                self._log.error(
+                    f"[{datetime.datetime.now()}]- [X] Error while fetching summary: {response.status_code}]"
+                )
+                return
+
+            ## 4. Deserialize the response, decompressing it here rather than in
+            ## urllib3, which may not know zstd
+            if response.headers.get("Content-Encoding") == ZSTD_ENCODING:
+                chunks = self._codec.decompress_chunks(
+                    response.raw.stream(self.READ_CHUNK_BYTES, decode_content=False)
+                )
+            else:
+                chunks = response.iter_content(chunk_size=self.READ_CHUNK_BYTES)
+            if STREAM_SUMMARIES:
+                for summary in read_messages(chunks, Summary):
+                    ## Only final summaries are stored, partial text is not asked for
+                    if not summary.partial:
+                        yield summary
+            else:
+                summary_list = SummaryBatch()
+                summary_list.ParseFromString(b"".join(chunks))
+                yield from summary_list.summaries
         end_time = time.time()
 
         self._log.info(
             f"[{datetime.datetime.now()}]- [x] Time taken to fetch summary {end_time - start_time}]"
         )
+        self._log.info(
+            f"[{datetime.datetime.now()}]- [x] Summary fetched successfully...]"
+        )
+
+    def _grpc_request(
+        self, article_list: ArticleBatch, articles: Iterable[Article]
+    ) -> Iterator[Summary]:
+        """Streams one article per message, reading summaries as they finish."""
+
+        def messages():
+            for article in articles:
+                message = ArticleBatch()
+                message.CopyFrom(article_list)
+                message.articles.append(article)
+                yield message
 
-        if response.status_code != 200:
+        start_time = time.time()
+        try:
+            for summary in self._summarize_stream(messages(), timeout=1200):
+                if not summary.partial:
+                    yield summary
+        except grpc.RpcError as e:
             self._log.error(
-                f"[{datetime.datetime.now()}]- [X] Error while fetching summary: {response.status_code}]"
+                f"[{datetime.datetime.now()}]- [X] Error while fetching summary: {e.code()}]"
             )
             return
+        end_time = time.time()
 
         self._log.info(
-            f"[{datetime.datetime.now()}]- [x] Summary fetched successfully...]"
+            f"[{datetime.datetime.now()}]- [x] Time taken to fetch summary {end_time - start_time}]"
         )
 
+    def _post(
+        self, article_list: ArticleBatch, articles: List[Article], compressed: bool
+    ) -> requests.Response:
+        ## 2. Serialze the articles: as one ArticleBatch, or streamed as
+        ## length-delimited frames over a chunked request
+        if STREAM_SUMMARIES:
+            body = self._article_frames(article_list, articles)
+            headers = {"Content-Type": STREAM_CONTENT_TYPE}
+        else:
+            batch = ArticleBatch()
+            batch.CopyFrom(article_list)
+            batch.articles.extend(articles)
+            body = batch.SerializeToString()
+            headers = {}
+
+        ## 3. Compress both ways once the summarizer has the same dictionary
+        if compressed:
+            if STREAM_SUMMARIES:
+                body = self._codec.compress_chunks(body)
+            else:
+                body = self._codec.compress(body)
+            headers["Content-Encoding"] = ZSTD_ENCODING
+            headers["Accept-Encoding"] = ZSTD_ENCODING
+
+        response = requests.post(
+            self.API_URL,
+            data=body,
+            headers=headers,
+            timeout=1200,
+            stream=True,
+        )
+        if self._codec is not None:
+            self._peer_decompresses = self._codec.agrees(response.headers)
         return response
 
+    def _article_frames(
+        self, article_list: ArticleBatch, articles: Iterable[Article]
+    ) -> Iterator[bytes]:
+        """The settings frame, then one frame per article as it is built."""
+        yield frame(article_list)
+        for article in articles:
+            yield frame(article)
+
     def _store_summary(self, summaryBatch: SummaryBatch):
         ## 1. Store the summary in the database
         summaries = [
@@ -186,6 +365,7 @@ class ScrapedArticleListener:
                 "date": summary.date,
                 "url": summary.url,
                 "title": summary.title,
+                "model_id": summary.model_id,
             }
             for summary in summaryBatch.summaries
         ]
@@ -208,6 +388,7 @@ class ScrapedArticleListener:
                     "date": summary.get("date"),
                     "url": summary.get("url"),
                     "title": summary.get("title"),
+                    "model_id": summary.get("model_id"),
                 },
                 properties=pika.BasicProperties(
                     delivery_mode=2,  # make message persistent
@@ -213,7 +213,7 @@ class Listener:
             logging.error("Nacking message: %s", message.to_json())
 
         def wrapper(ch, method, properties, body):
-            message = RMQMessage.from_json(body, properties=properties)
+            message = RMQMessage.from_body(body, properties=properties)
             message_callback(ch, method, message, handle_nack)
 
         return wrapper
@@ -0,0 +1,44 @@
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+from transformers import BartTokenizerFast
+
+
+def tokenizer_version(tokenizer, max_length: int) -> Optional[str]:
+    """
+    Fingerprint of everything that decides the input ids: vocabulary, merges,
+    pre- and post-processing and the truncation length. Must match the
+    summarizer's own computation, which only trusts ids carrying its tag.
+    """
+    if not tokenizer.is_fast:
+        return None
+    state = json.loads(tokenizer.backend_tokenizer.to_str())
+    parts = {
+        key: state.get(key)
+        for key in ("normalizer", "pre_tokenizer", "model", "post_processor")
+    }
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8"))
+    return f"{digest.hexdigest()[:16]}:{max_length}"
+
+
+class ArticleTokenizer:
+    """
+    Tokenizes articles for the summarizer, so the inference hosts do not
+    have to. Uses the same tokenizer and truncation as CrispySummarizer.
+    """
+
+    TOKENIZER_NAME = os.environ.get(
+        "SUMMARIZER_TOKENIZER", "Yale-LILY/brio-cnndm-uncased"
+    )
+    MAX_LENGTH = 1024
+
+    def __init__(self):
+        self._tokenizer = BartTokenizerFast.from_pretrained(self.TOKENIZER_NAME)
+        self.version = tokenizer_version(self._tokenizer, self.MAX_LENGTH)
+
+    def encode(self, contents: List[str]) -> List[List[int]]:
+        return self._tokenizer(
+            contents, max_length=self.MAX_LENGTH, truncation=True
+        )["input_ids"]